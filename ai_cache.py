@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+AI result cache for Dustbin
+Two-tier memoization of AI helper results: an in-process LRU in front of a SQLite table
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from render_cache import content_hash
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'ai_cache.db')
+
+# Seconds a result stays valid, per operation
+DEFAULT_TTLS = {
+    'detect_language': 7 * 24 * 3600,
+    'explain_code': 24 * 3600,
+    'complete_code': 3600,
+}
+
+_MISSING = object()
+
+
+class AICache:
+    """Memoizes results keyed by (operation, language, content hash, model)"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, max_entries: int = 1024,
+                 ttls: Optional[Dict[str, float]] = None, enabled: bool = True):
+        # path=None keeps results in memory only
+        self.enabled = enabled
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._local = threading.local()
+        self._writes = 0
+        self._stats = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # A bare file name lives in the working directory, which already exists
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ':memory:':
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS ai_result ("
+                "operation TEXT NOT NULL, language TEXT NOT NULL, content_hash TEXT NOT NULL, "
+                "model TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (operation, language, content_hash, model))"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _count(self, operation: str, outcome: str):
+        with self._lock:
+            counts = self._stats.setdefault(operation, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+    def _remember(self, key: Tuple, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _lookup_memory(self, key: Tuple, now: float) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[1] <= now:
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _lookup_disk(self, key: Tuple, now: float) -> Tuple[Any, float]:
+        if not self.path:
+            return _MISSING, 0.0
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM ai_result WHERE operation = ? AND language = ? "
+                "AND content_hash = ? AND model = ? AND expires_at > ?", key + (now,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"AI cache read failed: {e}")
+            return _MISSING, 0.0
+        return (json.loads(row[0]), row[1]) if row else (_MISSING, 0.0)
+
+    def _store_disk(self, key: Tuple, value: Any, expires_at: float, now: float):
+        if not self.path:
+            return
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO ai_result VALUES (?, ?, ?, ?, ?, ?)",
+                key + (json.dumps(value), expires_at)
+            )
+            self._writes += 1
+            if self._writes % 500 == 0:
+                connection.execute("DELETE FROM ai_result WHERE expires_at <= ?", (now,))
+        except sqlite3.Error as e:
+            print(f"AI cache write failed: {e}")
+
+    def memoize(self, operation: str, language: Optional[str], content: str,
+                model: Optional[str], compute: Callable[[], Any], digest: Optional[str] = None) -> Any:
+        """Return the cached result for these inputs, computing and storing it on a miss
+
+        digest is content_hash(content), for callers that have already computed it
+        """
+        if not self.enabled:
+            return compute()
+        key = (operation, language or '', digest or content_hash(content), model or '')
+        now = time.time()
+
+        value = self._lookup_memory(key, now)
+        if value is not _MISSING:
+            self._count(operation, 'memory_hits')
+            return value
+
+        value, expires_at = self._lookup_disk(key, now)
+        if value is not _MISSING:
+            self._count(operation, 'disk_hits')
+            self._remember(key, value, expires_at)
+            return value
+
+        self._count(operation, 'misses')
+        value = compute()
+        # Failures (None) are retried next time rather than remembered
+        if value is not None:
+            expires_at = now + self.ttls.get(operation, 3600)
+            self._remember(key, value, expires_at)
+            self._store_disk(key, value, expires_at, now)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+        if self.path:
+            self._connection().execute("DELETE FROM ai_result")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {}
+            for operation, counts in self._stats.items():
+                lookups = sum(counts.values())
+                hits = counts['memory_hits'] + counts['disk_hits']
+                operations[operation] = dict(
+                    counts, hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                    ttl=self.ttls.get(operation)
+                )
+            return {'enabled': self.enabled, 'entries_in_memory': len(self._entries),
+                    'operations': operations}
+
+
+def _env_ttls() -> Dict[str, float]:
+    ttls = {}
+    for operation in DEFAULT_TTLS:
+        value = os.getenv(f'AI_CACHE_TTL_{operation.upper()}')
+        if value:
+            ttls[operation] = float(value)
+    return ttls
+
+
+# Global AI cache instance
+ai_cache = AICache(
+    path=os.getenv('AI_CACHE_PATH', DEFAULT_PATH) or None,
+    max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', 1024)),
+    ttls=_env_ttls(),
+    enabled=os.getenv('AI_CACHE_ENABLED', 'true').lower() == 'true'
+)
@@ -5,23 +5,146 @@ Integrates with Hugging Face models for code assistance
 """
 
 import os
+import threading
+import time
 import requests
 import json
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, List, Tuple, Union
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ai_cache import AICache, ai_cache
+from render_cache import content_hash
 
 load_dotenv()
 
+# Heuristic language signatures: "pattern" or ("pattern", weight, case_sensitive)
+LANGUAGE_PATTERNS = {
+    "python": ["def ", "import ", "from ", "print(", "if __name__"],
+    "javascript": ["function ", "const ", "let ", "var ", "console.log"],
+    "java": ["public class", "public static void main", "System.out"],
+    "cpp": ["#include", "using namespace", "std::", "cout <<"],
+    "c": ["#include", "int main(", "printf("],
+    "html": ["<html", "<head", "<body", "<!DOCTYPE"],
+    "css": ["{", "}", ":", ";", "px", "color:"],
+    "sql": ["SELECT", "FROM", "WHERE", "INSERT", "UPDATE"],
+    "bash": ["#!/bin/bash", "echo ", "if [", "for "],
+    "rust": ["fn main(", "let ", "println!", "use "],
+    "go": ["package main", "func main(", "fmt.Print", "import "],
+    "php": ["<?php", "echo ", "$", "function "],
+    "ruby": ["def ", "puts ", "end", "class "],
+    "swift": ["func ", "var ", "let ", "print("],
+    "kotlin": ["fun main(", "val ", "var ", "println("]
+}
+
+class PatternTable:
+    """Language signatures compiled once into distinct needles for fast scoring"""
+
+    def __init__(self, table: Dict[str, List[Union[str, Tuple[str, float, bool]]]]):
+        self.order = {language: index for index, language in enumerate(table)}
+        # needle -> [(language, weight)]; a needle shared by languages is searched once
+        self.insensitive = {}
+        self.sensitive = {}
+        for language, patterns in table.items():
+            for entry in patterns:
+                pattern, weight, case_sensitive = (entry, 1, False) if isinstance(entry, str) else entry
+                if case_sensitive:
+                    self.sensitive.setdefault(pattern, []).append((language, weight))
+                else:
+                    self.insensitive.setdefault(pattern.lower(), []).append((language, weight))
+
+    def scores(self, code: str) -> Dict[str, float]:
+        """Sum the weights of every pattern present in the code, per language"""
+        scores = {}
+        for needles, text in ((self.insensitive, code.lower() if self.insensitive else ''),
+                              (self.sensitive, code)):
+            for needle, credits in needles.items():
+                # Substring search runs in C; a pure-Python automaton is slower at this size
+                if needle in text:
+                    for language, weight in credits:
+                        scores[language] = scores.get(language, 0) + weight
+        return scores
+
+    def best(self, code: str) -> Optional[str]:
+        """Highest scoring language, ties going to the one listed first"""
+        scores = self.scores(code)
+        matched = [language for language, score in scores.items() if score > 0]
+        if not matched:
+            return None
+        return max(matched, key=lambda language: (scores[language], -self.order[language]))
+
+language_patterns = PatternTable(LANGUAGE_PATTERNS)
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Tuple, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self.calls += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            # Later callers start a fresh call; waiters already hold this one
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+        return call['result']
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
 class HuggingFaceAPI:
     """Hugging Face API client for code assistance"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[AICache] = None):
+        self.cache = cache or ai_cache
+        # Identical upstream calls already in progress are joined rather than repeated
+        self.inflight = SingleFlight()
         self.api_token = os.getenv('HUGGINGFACE_API_TOKEN')
-        self.base_url = "https://api-inference.huggingface.co/models"
+        # Override to use a mirror or the local stand-in (python hf_standin.py)
+        self.base_url = os.getenv('HF_BASE_URL', "https://api-inference.huggingface.co/models").rstrip('/')
         self.headers = {
             "Authorization": f"Bearer {self.api_token}" if self.api_token else None,
             "Content-Type": "application/json"
         }
+
+        # Connection pool shared by every request thread
+        self.pool_size = int(os.getenv('HF_POOL_SIZE', 10))
+        self.connect_timeout = float(os.getenv('HF_CONNECT_TIMEOUT', 3.05))
+        self.max_retries = int(os.getenv('HF_MAX_RETRIES', 3))
+        self.backoff_factor = float(os.getenv('HF_BACKOFF_FACTOR', 0.5))
+        self.session = self._build_session()
+
+        # Model probe results: {model: (available, checked_at wall-clock time)}
+        self.probe_ttl = float(os.getenv('HF_PROBE_TTL', 300))
+        self._probes = {}
+        self._probe_lock = threading.Lock()
+        self._refreshing = False
         
         # Reliable models that are known to work
         self.models = {
@@ -32,26 +155,101 @@ class HuggingFaceAPI:
             "code_explanation": "microsoft/CodeBERT-base"
         }
     
+    def _build_session(self) -> requests.Session:
+        """Keep-alive session that retries failed connections with backoff"""
+        # Only connection errors are retried; a request that reached the model is not resent
+        retry = Retry(total=self.max_retries, connect=self.max_retries, read=0, status=0,
+                      other=0, backoff_factor=self.backoff_factor)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({k: v for k, v in self.headers.items() if v})
+        return session
+
     def test_model_availability(self, model_name: str) -> bool:
         """Test if a model is available and responding"""
+        return self.inflight.do(("test_model_availability", model_name, ""),
+                                lambda: self._probe_model(model_name))
+
+    def _probe_model(self, model_name: str) -> bool:
         try:
             url = f"{self.base_url}/{model_name}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=(self.connect_timeout, 10))
             return response.status_code == 200
         except Exception as e:
             print(f"Error testing model {model_name}: {e}")
             return False
     
-    def get_available_models(self) -> Dict[str, str]:
-        """Get list of available and working models"""
-        available = {}
+    def refresh_models(self) -> Dict[str, str]:
+        """Probe every model concurrently and store the results"""
+        models = sorted(set(self.models.values()))
+        with ThreadPoolExecutor(max_workers=len(models)) as pool:
+            results = dict(zip(models, pool.map(self.test_model_availability, models)))
+        checked_at = time.time()
+        with self._probe_lock:
+            for model, available in results.items():
+                self._probes[model] = (available, checked_at)
         for task, model in self.models.items():
-            if self.test_model_availability(model):
-                available[task] = model
-            else:
+            if not results[model]:
                 print(f"Model {model} for {task} is not available")
-        return available
-    
+        return self._available_from_cache()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh_models()
+        finally:
+            self._refreshing = False
+
+    def _ensure_fresh(self):
+        """Start a background refresh when any probe result is missing or older than the TTL"""
+        now = time.time()
+        with self._probe_lock:
+            stale = any(
+                model not in self._probes or now - self._probes[model][1] > self.probe_ttl
+                for model in self.models.values()
+            )
+            if not stale or self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _available_from_cache(self) -> Dict[str, str]:
+        with self._probe_lock:
+            return {task: model for task, model in self.models.items()
+                    if self._probes.get(model, (False, None))[0]}
+
+    def get_available_models(self) -> Dict[str, str]:
+        """Get list of available and working models, from cached probe results"""
+        # Never blocks on the network; stale results are served while a refresh runs
+        self._ensure_fresh()
+        return self._available_from_cache()
+
+    def model_status(self) -> Dict[str, Dict[str, Any]]:
+        """Cached probe result and its age for every task's model"""
+        self._ensure_fresh()
+        now = time.time()
+        with self._probe_lock:
+            status = {}
+            for task, model in self.models.items():
+                available, checked_at = self._probes.get(model, (None, None))
+                status[task] = {
+                    'model': model,
+                    'available': available,
+                    'age_seconds': round(now - checked_at, 1) if checked_at else None
+                }
+            return status
+
+    def _memoized(self, operation: str, language: Optional[str], code: str, model: str,
+                  compute: Callable[[], Any]) -> Any:
+        """Cached result, else one shared call among concurrent identical requests"""
+        # Snippets can be large; hash once for both the cache and the in-flight key
+        digest = content_hash(code)
+        key = (operation, language or '', digest, model)
+        return self.cache.memoize(operation, language, code, model,
+                                  lambda: self.inflight.do(key, compute), digest=digest)
+
     def generate_code_completion(self, code: str, language: str = "python") -> Optional[str]:
         """Generate code completion suggestions"""
         if not self.api_token:
@@ -60,7 +258,11 @@ class HuggingFaceAPI:
         model = self.models.get("code_completion")
         if not model:
             return None
-            
+
+        return self._memoized("complete_code", language, code, model,
+                               lambda: self._request_completion(model, code, language))
+
+    def _request_completion(self, model: str, code: str, language: str) -> Optional[str]:
         try:
             url = f"{self.base_url}/{model}"
             payload = {
@@ -72,7 +274,7 @@ class HuggingFaceAPI:
                 }
             }
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=30)
+            response = self.session.post(url, json=payload, timeout=(self.connect_timeout, 30))
             
             if response.status_code == 200:
                 result = response.json()
@@ -89,42 +291,18 @@ class HuggingFaceAPI:
     def detect_programming_language(self, code: str) -> Optional[str]:
         """Detect programming language from code snippet"""
         # Simple heuristic-based detection as fallback
-        language_patterns = {
-            "python": ["def ", "import ", "from ", "print(", "if __name__"],
-            "javascript": ["function ", "const ", "let ", "var ", "console.log"],
-            "java": ["public class", "public static void main", "System.out"],
-            "cpp": ["#include", "using namespace", "std::", "cout <<"],
-            "c": ["#include", "int main(", "printf("],
-            "html": ["<html", "<head", "<body", "<!DOCTYPE"],
-            "css": ["{", "}", ":", ";", "px", "color:"],
-            "sql": ["SELECT", "FROM", "WHERE", "INSERT", "UPDATE"],
-            "bash": ["#!/bin/bash", "echo ", "if [", "for "],
-            "rust": ["fn main(", "let ", "println!", "use "],
-            "go": ["package main", "func main(", "fmt.Print", "import "],
-            "php": ["<?php", "echo ", "$", "function "],
-            "ruby": ["def ", "puts ", "end", "class "],
-            "swift": ["func ", "var ", "let ", "print("],
-            "kotlin": ["fun main(", "val ", "var ", "println("]
-        }
-        
-        code_lower = code.lower()
-        scores = {}
-        
-        for lang, patterns in language_patterns.items():
-            score = sum(1 for pattern in patterns if pattern.lower() in code_lower)
-            if score > 0:
-                scores[lang] = score
-        
-        if scores:
-            return max(scores, key=scores.get)
-        
-        return "text"
-    
+        return self._memoized("detect_language", None, code, "heuristic",
+                               lambda: language_patterns.best(code) or "text")
+
     def explain_code(self, code: str, language: str = "python") -> Optional[str]:
         """Generate explanation for code snippet"""
         if not self.api_token:
             return f"This {language} code snippet contains various programming constructs. Enable AI features by setting HUGGINGFACE_API_TOKEN."
-            
+
+        return self._memoized("explain_code", language, code, "rules",
+                               lambda: self._explain_with_rules(code, language))
+
+    def _explain_with_rules(self, code: str, language: str) -> str:
         # Simple rule-based explanation as fallback
         explanations = []
         
@@ -176,7 +354,7 @@ def hello_world():
     explanation = ai_helper.explain_code(test_code, detected)
     print(f"Code explanation: {explanation}")
     
-    available = ai_helper.get_available_models()
+    available = ai_helper.refresh_models()
     print(f"Available models: {list(available.keys())}")
     
     if ai_helper.api_token:
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+AI job queue for Dustbin
+Runs slow AI calls on a bounded pool of background workers so request threads return at once
+
+Jobs live in this process's memory. Run the app as a single process (threads are fine) when
+async AI calls are used: under several worker processes a poll can land on a process that never
+saw the job and gets a 404, and queued jobs are lost on restart.
+"""
+
+import atexit
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class JobQueue:
+    """Bounded queue of AI jobs, polled by id until they finish; in-process, not shared between workers"""
+
+    def __init__(self, workers: int = 4, max_queued: int = 64, result_ttl: float = 300.0,
+                 max_wait: float = 25.0):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.max_wait = max_wait
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopped = False
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Recent (wait, run) seconds for the stats
+        self._timings = deque(maxlen=200)
+
+    def init_app(self, app):
+        """Size the pool and queue from the app config"""
+        self.workers = app.config.get('AI_JOB_WORKERS', self.workers)
+        self.max_queued = app.config.get('AI_JOB_QUEUE_SIZE', self.max_queued)
+        self.result_ttl = app.config.get('AI_JOB_RESULT_TTL', self.result_ttl)
+        self.max_wait = app.config.get('AI_JOB_MAX_WAIT', self.max_wait)
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        atexit.register(self.shutdown)
+
+    def submit(self, func: Callable[[], Any]) -> Optional[Dict[str, Any]]:
+        """Queue func and return its job, or None when the queue is full"""
+        self._expire()
+        job = {
+            'id': secrets.token_urlsafe(12),
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+            'done': threading.Event(),
+            'func': func,
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job['id']]
+                self.rejected += 1
+            return None
+        self._start()
+        return job
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Look up a job, blocking up to wait seconds (capped at max_wait) for it to finish"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and wait > 0:
+            job['done'].wait(min(wait, self.max_wait))
+        return job
+
+    def _start(self):
+        with self._lock:
+            if self._stopped:
+                return
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'ai-job-{len(self._threads)}',
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._running += 1
+                job['started_at'] = time.time()
+                job['status'] = 'running'
+            try:
+                job['result'] = job['func']()
+                job['status'] = 'done'
+            except Exception as e:
+                print(f"Error running AI job {job['id']}: {e}")
+                job['error'] = str(e)
+                job['status'] = 'failed'
+            job['finished_at'] = time.time()
+            job['func'] = None
+            with self._lock:
+                self._running -= 1
+                if job['status'] == 'done':
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._timings.append((job['started_at'] - job['submitted_at'],
+                                      job['finished_at'] - job['started_at']))
+            job['done'].set()
+
+    def _expire(self):
+        """Forget finished jobs nobody has fetched within the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job['finished_at'] and job['finished_at'] < cutoff]:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        """Stop the workers once they finish their current job"""
+        with self._lock:
+            self._stopped = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = list(self._timings)
+            stats = {
+                'workers': self.workers,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self.max_queued,
+                'running': self._running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+        for index, name in enumerate(('wait', 'run')):
+            values = sorted(timing[index] for timing in timings)
+            stats[f'{name}_seconds'] = {
+                'mean': round(sum(values) / len(values), 4) if values else None,
+                'max': round(values[-1], 4) if values else None,
+            }
+        return stats
+
+
+def job_to_api(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job: status, timings and, once finished, its result"""
+    finished_at = job['finished_at']
+    started_at = job['started_at']
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'wait_seconds': round((started_at or time.time()) - job['submitted_at'], 4),
+        'run_seconds': round((finished_at or time.time()) - started_at, 4) if started_at else None,
+        'result': job['result'],
+        'error': job['error'],
+    }
+
+
+# Global AI job queue instance
+ai_jobs = JobQueue()
@@ -1,23 +1,40 @@
 import os
+import base64
 import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, Response
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.ext.hybrid import hybrid_property
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, BooleanField, PasswordField
 from wtforms.validators import DataRequired, Length, Optional
+import pygments
 from pygments import highlight
 from pygments.lexers import get_lexer_by_name, get_all_lexers
 from pygments.formatters import HtmlFormatter
 from pygments.util import ClassNotFound
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 from dotenv import load_dotenv
 import secrets
 import string
-import markdown
 import bleach
 from ai_helper import get_code_suggestions, ai_helper
+from ai_jobs import ai_jobs, job_to_api
+from language_registry import language_registry
+from render_cache import RenderCache, render_cache, content_hash
+from markdown_renderer import markdown_renderer
+from view_counter import view_counter
+from search_index import search_index, split_results
+from expiry_reaper import expiry_reaper
+from site_counters import site_counters
+from stats_rollup import stats_rollup
+from blob_store import blob_store, HTTP_CODINGS, PREVIEW_CHARS, decode as decode_blob
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +43,30 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///dustbin.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['RENDER_CACHE_MAX_BYTES'] = int(os.getenv('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['RENDER_ON_WRITE'] = os.getenv('RENDER_ON_WRITE', 'false').lower() in ('1', 'true', 'yes')
+app.config['VIEW_FLUSH_INTERVAL'] = float(os.getenv('VIEW_FLUSH_INTERVAL', 5))
+app.config['VIEW_FLUSH_THRESHOLD'] = int(os.getenv('VIEW_FLUSH_THRESHOLD', 1000))
+app.config['EXPIRY_REAPER_ENABLED'] = os.getenv('EXPIRY_REAPER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+app.config['EXPIRY_REAPER_INTERVAL'] = float(os.getenv('EXPIRY_REAPER_INTERVAL', 60))
+app.config['EXPIRY_REAPER_BATCH_SIZE'] = int(os.getenv('EXPIRY_REAPER_BATCH_SIZE', 500))
+app.config['COUNT_CACHE_TTL'] = float(os.getenv('COUNT_CACHE_TTL', 30))
+app.config['COUNT_CACHE_MAX_ENTRIES'] = int(os.getenv('COUNT_CACHE_MAX_ENTRIES', 256))
+app.config['COUNTER_CACHE_TTL'] = float(os.getenv('COUNTER_CACHE_TTL', 10))
+app.config['STATS_CACHE_TTL'] = float(os.getenv('STATS_CACHE_TTL', 10))
+app.config['BATCH_MAX_ITEMS'] = int(os.getenv('BATCH_MAX_ITEMS', 500))
+app.config['BATCH_MAX_BYTES'] = int(os.getenv('BATCH_MAX_BYTES', 32 * 1024 * 1024))
+app.config['MULTIGET_MAX_IDS'] = int(os.getenv('MULTIGET_MAX_IDS', 100))
+app.config['EXPORT_WINDOW_SIZE'] = int(os.getenv('EXPORT_WINDOW_SIZE', 500))
+app.config['BLOB_CODEC'] = os.getenv('BLOB_CODEC', 'gzip')
+app.config['BLOB_COMPRESS_THRESHOLD'] = int(os.getenv('BLOB_COMPRESS_THRESHOLD', 1024))
+app.config['BLOB_COMPRESS_LEVEL'] = int(os.getenv('BLOB_COMPRESS_LEVEL', 6))
+app.config['AI_JOB_WORKERS'] = int(os.getenv('AI_JOB_WORKERS', 4))
+app.config['AI_JOB_QUEUE_SIZE'] = int(os.getenv('AI_JOB_QUEUE_SIZE', 64))
+app.config['AI_JOB_RESULT_TTL'] = float(os.getenv('AI_JOB_RESULT_TTL', 300))
+app.config['AI_JOB_MAX_WAIT'] = float(os.getenv('AI_JOB_MAX_WAIT', 25))
+
+render_cache.max_bytes = app.config['RENDER_CACHE_MAX_BYTES']
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -33,6 +74,9 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Stored renders produced by a different Pygments release or formatter setup are stale
+RENDER_VERSION = f"pygments-{pygments.__version__}:default:linenos"
+
 # Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -50,27 +94,105 @@ class User(UserMixin, db.Model):
 
 
 
+class PasteBlob(db.Model):
+    hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the UTF-8 body
+    content = db.Column(db.Text, nullable=False, default='')  # empty when compressed
+    data = db.deferred(db.Column(db.LargeBinary, nullable=True))  # compressed body, loaded on use
+    encoding = db.Column(db.String(16), nullable=True)  # codec of data, None when plain
+    size = db.Column(db.Integer, nullable=False)  # uncompressed UTF-8 bytes
+    preview = db.Column(db.Text, nullable=True)  # first PREVIEW_CHARS characters, always plain
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def text(self):
+        """The body, decompressed once per loaded row"""
+        if self.encoding is None:
+            return self.content
+        text = self.__dict__.get('_text')
+        if text is None:
+            text = self._text = decode_blob(self.encoding, self.data)
+        return text
+
 class Paste(db.Model):
     id = db.Column(db.String(8), primary_key=True)
     title = db.Column(db.String(200), nullable=True)
-    content = db.Column(db.Text, nullable=False)
+    blob_hash = db.Column(db.String(64), db.ForeignKey('paste_blob.hash'), nullable=False, index=True)
     language = db.Column(db.String(50), default='text')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
     is_public = db.Column(db.Boolean, default=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     views = db.Column(db.Integer, default=0)
+    rendered = db.relationship('RenderedPaste', uselist=False, lazy=True,
+                               cascade='all, delete-orphan')
+    blob = db.relationship('PasteBlob', lazy='joined')
+
+    # Public listings filter on visibility and read newest first
+    __table_args__ = (
+        db.Index('ix_paste_public_created', 'is_public', 'created_at', 'id'),
+    )
 
     def __init__(self, **kwargs):
         super(Paste, self).__init__(**kwargs)
         if not self.id:
             self.id = self.generate_id()
 
+    @hybrid_property
+    def content(self):
+        """Paste body, stored once per distinct content in paste_blob"""
+        pending = self.__dict__.get('_pending_content')
+        if pending is not None:
+            return pending
+        return self.blob.text if self.blob is not None else None
+
+    @content.setter
+    def content(self, value):
+        # The blob row is created or referenced by blob_store when the paste is flushed
+        self._pending_content = value
+        self.blob_hash = content_hash(value) if value is not None else None
+
+    @property
+    def preview(self):
+        """Start of the body for listings, without decompressing it"""
+        pending = self.__dict__.get('_pending_content')
+        if pending is None and self.blob is not None and self.blob.preview is not None:
+            return self.blob.preview
+        # Blobs stored before previews existed; `migrate_blobs.py --previews` fills them in
+        return (self.content or '')[:PREVIEW_CHARS]
+
+    @property
+    def size(self):
+        """Body length in UTF-8 bytes"""
+        pending = self.__dict__.get('_pending_content')
+        if pending is None and self.blob is not None:
+            return self.blob.size
+        return len((self.content or '').encode('utf-8'))
+
+    @content.expression
+    def content(cls):
+        # Compressed bodies are opaque to SQL; substring search reads the FTS copy instead
+        return db.select(PasteBlob.content).where(
+            PasteBlob.hash == cls.blob_hash
+        ).scalar_subquery()
+
     def generate_id(self):
         """Generate a random 8-character ID"""
         chars = string.ascii_letters + string.digits
         return ''.join(secrets.choice(chars) for _ in range(8))
 
+    @property
+    def last_modified(self):
+        """When the paste last changed; pastes from before updated_at use created_at"""
+        return self.updated_at or self.created_at
+
+    def api_etag(self):
+        """Validator for the JSON representation, derived from the content hash"""
+        return content_hash('|'.join(str(part) for part in (
+            self.blob_hash, self.last_modified.isoformat(), self.title, self.language,
+            self.is_public, self.user_id
+        )))
+
     def is_expired(self):
         if self.expires_at:
             return datetime.utcnow() > self.expires_at
@@ -78,47 +200,57 @@ class Paste(db.Model):
 
     def get_highlighted_content(self):
         """Return syntax highlighted content"""
+        pygments_lexer = get_pygments_lexer_for_language(self.language)
+
+        # Serve the render stored at write time when it is still current
+        if app.config['RENDER_ON_WRITE']:
+            rendered = self.rendered
+            if rendered is not None and rendered.is_fresh(pygments_lexer, self.blob_hash):
+                return rendered.html
+
+        key = RenderCache.make_key(self.blob_hash, pygments_lexer, 'default', True)
+        html = render_cache.get(key)
+        if html is None:
+            html = self.render_highlighted(pygments_lexer)
+            render_cache.put(key, html)
+        return html
+
+    def render_highlighted(self, pygments_lexer=None):
+        """Run Pygments over the content, bypassing every cache"""
+        if pygments_lexer is None:
+            pygments_lexer = get_pygments_lexer_for_language(self.language)
+        formatter = HtmlFormatter(style='default', cssclass='highlight', linenos=True)
         try:
             # Get the correct Pygments lexer for this language
-            pygments_lexer = get_pygments_lexer_for_language(self.language)
             lexer = get_lexer_by_name(pygments_lexer)
-            formatter = HtmlFormatter(style='default', cssclass='highlight', linenos=True)
-            return highlight(self.content, lexer, formatter)
         except ClassNotFound:
             # Fallback to plain text
-            formatter = HtmlFormatter(style='default', cssclass='highlight', linenos=True)
             lexer = get_lexer_by_name('text')
-            return highlight(self.content, lexer, formatter)
+        return highlight(self.content, lexer, formatter)
+
+    def store_rendered(self):
+        """Render the content now and persist it in the side table"""
+        pygments_lexer = get_pygments_lexer_for_language(self.language)
+        html = self.render_highlighted(pygments_lexer)
+        if self.rendered is None:
+            self.rendered = RenderedPaste(html=html, pygments_lexer=pygments_lexer,
+                                          render_version=RENDER_VERSION, blob_hash=self.blob_hash)
+        else:
+            self.rendered.html = html
+            self.rendered.pygments_lexer = pygments_lexer
+            self.rendered.blob_hash = self.blob_hash
+            self.rendered.render_version = RENDER_VERSION
+            self.rendered.rendered_at = datetime.utcnow()
+
+    def invalidate_rendered(self):
+        """Drop cached renderings of the current content"""
+        render_cache.invalidate(self.blob_hash)
 
     def get_markdown_preview(self):
         """Return rendered Markdown content"""
         if self.language.lower() in ['markdown', 'md']:
-            # Configure markdown with safe extensions
-            md = markdown.Markdown(extensions=[
-                'codehilite',
-                'fenced_code',
-                'tables',
-                'toc',
-                'nl2br'
-            ])
-            html = md.convert(self.content)
-            # Sanitize HTML to prevent XSS
-            allowed_tags = [
-                'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-                'p', 'br', 'strong', 'em', 'u', 's', 'del',
-                'ul', 'ol', 'li', 'blockquote', 'pre', 'code',
-                'table', 'thead', 'tbody', 'tr', 'th', 'td',
-                'a', 'img', 'hr', 'div', 'span'
-            ]
-            allowed_attributes = {
-                'a': ['href', 'title'],
-                'img': ['src', 'alt', 'title', 'width', 'height'],
-                'code': ['class'],
-                'div': ['class'],
-                'span': ['class'],
-                'pre': ['class']
-            }
-            return bleach.clean(html, tags=allowed_tags, attributes=allowed_attributes)
+            # Shares the highlighted-HTML cache and its content-hash invalidation
+            return markdown_renderer.render(self.content, self.blob_hash)
         return None
 
     def is_previewable(self):
@@ -136,6 +268,98 @@ class Paste(db.Model):
             return 'svg'
         return None
 
+class RenderedPaste(db.Model):
+    paste_id = db.Column(db.String(8), db.ForeignKey('paste.id'), primary_key=True)
+    html = db.Column(db.Text, nullable=False)
+    pygments_lexer = db.Column(db.String(50), nullable=False)
+    render_version = db.Column(db.String(64), nullable=False)
+    # Body the HTML was rendered from; edits made with RENDER_ON_WRITE off leave it behind
+    blob_hash = db.Column(db.String(64), nullable=True)
+    rendered_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def is_fresh(self, pygments_lexer, blob_hash):
+        """Check the render matches the current body, lexer mapping and Pygments release"""
+        return (self.blob_hash == blob_hash and self.pygments_lexer == pygments_lexer
+                and self.render_version == RENDER_VERSION)
+
+class SiteCounter(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class LanguageStat(db.Model):
+    language = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    public = db.Column(db.Integer, nullable=False, default=0)
+
+class HourlyStat(db.Model):
+    hour = db.Column(db.DateTime, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    public = db.Column(db.Integer, nullable=False, default=0)
+
+class ImportProgress(db.Model):
+    source = db.Column(db.String(500), primary_key=True)  # absolute path of an import source
+    position = db.Column(db.Integer, nullable=False, default=0)  # source entries consumed
+    imported = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def insert_pastes(pastes):
+    """Bulk-insert new pastes together with their side-table rows"""
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    for paste in pastes:
+        # Column defaults only apply to ORM flushes, so fill them in here
+        paste.created_at = paste.created_at or now
+        paste.updated_at = paste.updated_at or paste.created_at
+        paste.language = paste.language or 'text'
+        paste.is_public = True if paste.is_public is None else paste.is_public
+        paste.views = 0
+
+    blob_store.add(connection, pastes)
+    connection.execute(db.insert(Paste.__table__), [{
+        'id': p.id, 'title': p.title, 'blob_hash': p.blob_hash, 'language': p.language,
+        'created_at': p.created_at, 'updated_at': p.updated_at, 'expires_at': p.expires_at,
+        'is_public': p.is_public, 'user_id': p.user_id, 'views': p.views
+    } for p in pastes])
+    if app.config['RENDER_ON_WRITE']:
+        rows = []
+        for paste in pastes:
+            pygments_lexer = get_pygments_lexer_for_language(paste.language)
+            rows.append({'paste_id': paste.id, 'html': paste.render_highlighted(pygments_lexer),
+                         'pygments_lexer': pygments_lexer, 'render_version': RENDER_VERSION,
+                         'blob_hash': paste.blob_hash, 'rendered_at': now})
+        connection.execute(db.insert(RenderedPaste.__table__), rows)
+    search_index.add(connection, pastes)
+    stats_rollup.add(connection, pastes)
+    site_counters.adjust(connection, 'pastes', len(pastes))
+
+def purge_pastes(paste_ids):
+    """Bulk-delete pastes by id together with their side-table rows"""
+    db.session.execute(db.delete(RenderedPaste).where(RenderedPaste.paste_id.in_(paste_ids)))
+    search_index.remove(db.session.connection(), paste_ids)
+    stats_rollup.remove(db.session.connection(), paste_ids)
+    blob_store.remove(db.session.connection(), paste_ids)
+    result = db.session.execute(db.delete(Paste).where(Paste.id.in_(paste_ids)),
+                                execution_options={'synchronize_session': False})
+    site_counters.adjust(db.session.connection(), 'pastes', -result.rowcount)
+
+view_counter.init_app(app, db, Paste)
+search_index.init_app(app, db, Paste)
+site_counters.init_app(app, db, SiteCounter, {'pastes': Paste, 'users': User})
+stats_rollup.init_app(app, db, Paste, LanguageStat, HourlyStat)
+blob_store.init_app(app, db, Paste, PasteBlob)
+if not search_index.available and blob_store.codec != 'none':
+    # Without the index's plain copy, substring search can only read uncompressed bodies
+    print("FTS5 not available, paste bodies are stored uncompressed")
+    blob_store.codec = 'none'
+expiry_reaper.init_app(app, db, Paste, purge_pastes)
+ai_jobs.init_app(app)
+
+@app.before_request
+def start_background_jobs():
+    """Start the expiry reaper once the app is actually serving requests"""
+    if app.config['EXPIRY_REAPER_ENABLED'] and not app.config['TESTING']:
+        expiry_reaper.start()
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -144,9 +368,8 @@ def load_user(user_id):
 def inject_stats():
     """Inject global statistics into templates"""
     try:
-        total_pastes = Paste.query.count()
-        total_users = User.query.count()
-        return dict(total_pastes=total_pastes, total_users=total_users)
+        counters = site_counters.get_all()
+        return dict(total_pastes=counters.get('pastes', 0), total_users=counters.get('users', 0))
     except Exception:
         # Return default values if database is not ready
         return dict(total_pastes=0, total_users=0)
@@ -176,56 +399,106 @@ class RegisterForm(FlaskForm):
     password = PasswordField('Password', validators=[DataRequired(), Length(min=6)])
 
 # Helper functions
-def load_language_config():
-    """Load language configuration from JSON file"""
-    try:
-        with open('highlight/languages.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Fallback to basic languages if JSON file is missing
-        return {
-            "languages": [
-                {"id": "text", "name": "Plain Text", "pygments_lexer": "text", "category": "text"},
-                {"id": "python", "name": "Python", "pygments_lexer": "python", "category": "programming"},
-                {"id": "javascript", "name": "JavaScript", "pygments_lexer": "javascript", "category": "web"},
-                {"id": "html", "name": "HTML", "pygments_lexer": "html", "category": "web"},
-                {"id": "css", "name": "CSS", "pygments_lexer": "css", "category": "web"},
-                {"id": "json", "name": "JSON", "pygments_lexer": "json", "category": "data"}
-            ],
-            "categories": {"text": "Text", "programming": "Programming", "web": "Web", "data": "Data"}
-        }
+def with_author(query):
+    """Load each paste's author name in the listing query itself, avoiding N+1 lookups"""
+    return query.options(db.joinedload(Paste.author).load_only(User.username))
+
+def substring_search(query, text):
+    """Filter a Paste query to titles or bodies containing text"""
+    filtered = search_index.substring(query, text)
+    if filtered is not None:
+        return filtered
+    return query.filter(db.or_(Paste.title.contains(text), Paste.content.contains(text)))
+
+def validate_paste_data(data):
+    """Return why API paste data cannot be created, or None if it is valid"""
+    if not isinstance(data, dict):
+        return 'Paste must be a JSON object'
+    if 'content' not in data:
+        return 'Content is required'
+    if not isinstance(data['content'], str):
+        return 'Content must be a string'
+    if len(data['content']) > 1000000:  # 1MB limit
+        return 'Content too large (max 1MB)'
+    return None
 
-def get_language_choices():
-    """Get list of available programming languages from JSON config"""
-    config = load_language_config()
-    languages = []
+def paste_from_data(data):
+    """Build a new paste from validated API data"""
+    return Paste(
+        title=data.get('title'),
+        content=data['content'],
+        language=data.get('language', 'text'),
+        expires_at=calculate_expiry(data.get('expires_in', 'never')),
+        is_public=data.get('is_public', True),
+        user_id=current_user.id if current_user.is_authenticated else None
+    )
+
+def can_view(paste):
+    """Check a paste is unexpired and either public or owned by the current user"""
+    if paste.is_expired():
+        return False
+    return paste.is_public or (current_user.is_authenticated and current_user.id == paste.user_id)
+
+def paste_to_api(paste, include_content=True):
+    """Serialize a paste the way GET /api/v1/pastes/<id> returns it"""
+    data = {
+        'id': paste.id,
+        'title': paste.title,
+        'language': paste.language,
+        'created_at': paste.created_at.isoformat(),
+        'updated_at': paste.last_modified.isoformat(),
+        'expires_at': paste.expires_at.isoformat() if paste.expires_at else None,
+        'is_public': paste.is_public,
+        'views': paste.views + view_counter.pending(paste.id),
+        'author': paste.author.username if paste.author else None,
+        'preview_available': paste.is_previewable(),
+        'preview_type': paste.get_preview_type(),
+        'urls': {
+            'view': url_for('view_paste', paste_id=paste.id, _external=True),
+            'raw': url_for('raw_paste', paste_id=paste.id, _external=True),
+            'preview': url_for('preview_paste', paste_id=paste.id, _external=True) if paste.is_previewable() else None
+        }
+    }
+    if include_content:
+        data['content'] = paste.content
+        data['content_length'] = paste.size
+    return data
+
+def without_content(query):
+    """Leave the paste body unloaded until it is touched, so conditional GETs stay cheap"""
+    return query.options(db.lazyload(Paste.blob))
+
+def matching_etag(paste, etags):
+    """Return the validator the client already holds for this version of the paste, if any"""
+    if request.if_none_match:
+        return next((tag for tag in etags if request.if_none_match.contains_weak(tag)), None)
+    if request.if_modified_since:
+        since = request.if_modified_since.replace(tzinfo=None)
+        if paste.last_modified.replace(microsecond=0) <= since:
+            return etags[0]
+    return None
 
-    # Group languages by category
-    categories = {}
-    for lang in config['languages']:
-        category = lang.get('category', 'other')
-        if category not in categories:
-            categories[category] = []
-        categories[category].append((lang['id'], lang['name']))
+def with_validators(response, paste, etag):
+    """Attach ETag and Last-Modified to a paste response"""
+    response.set_etag(etag)
+    response.last_modified = paste.last_modified
+    return response
 
-    # Add languages in order: text first, then by category
-    if 'text' in categories:
-        languages.extend(categories['text'])
-        del categories['text']
+def not_modified(paste, etag, headers=None):
+    """304 response for a client whose cached copy is still current"""
+    return with_validators(Response(status=304, headers=headers), paste, etag)
 
-    # Add other categories
-    for category_id in sorted(categories.keys()):
-        languages.extend(sorted(categories[category_id], key=lambda x: x[1]))
+def load_language_config():
+    """Load language configuration from the in-memory registry"""
+    return language_registry.config
 
-    return languages
+def get_language_choices():
+    """Get list of available programming languages from JSON config"""
+    return language_registry.choices()
 
 def get_pygments_lexer_for_language(language_id):
     """Get the Pygments lexer name for a language ID"""
-    config = load_language_config()
-    for lang in config['languages']:
-        if lang['id'] == language_id:
-            return lang['pygments_lexer']
-    return 'text'  # fallback
+    return language_registry.pygments_lexer(language_id)
 
 
 
@@ -247,11 +520,65 @@ def calculate_expiry(expires_in):
         return now + timedelta(days=30)
     return None
 
+def encode_cursor(paste):
+    """Encode a paste's (created_at, id) sort key as an opaque cursor"""
+    raw = f"{paste.created_at.isoformat()}|{paste.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor(); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, paste_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|', 1)
+        return datetime.fromisoformat(created_at), paste_id
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_datetime_arg(name):
+    """Read an optional ISO 8601 query argument; raises ValueError if malformed"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name} (expected ISO 8601, e.g. 2024-01-31T12:00:00)')
+
+def gzip_stream(chunks):
+    """Gzip a stream of text chunks, flushing after each so output keeps flowing"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+# Approximate listing totals, keyed by filters: {key: (expires_at, count)}, least recently used first
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+def cached_count(key, query):
+    """Count a query at most once per COUNT_CACHE_TTL seconds"""
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[0] > now:
+            _count_cache.move_to_end(key)
+            return cached[1]
+    count = query.order_by(None).count()
+    with _count_cache_lock:
+        _count_cache[key] = (now + app.config['COUNT_CACHE_TTL'], count)
+        _count_cache.move_to_end(key)
+        # Search terms are free text, so bound the cache rather than keep every key seen
+        for stale in [k for k, (expires_at, _) in _count_cache.items() if expires_at <= now]:
+            del _count_cache[stale]
+        while len(_count_cache) > app.config['COUNT_CACHE_MAX_ENTRIES']:
+            _count_cache.popitem(last=False)
+    return count
+
 # Routes
 @app.route('/')
 def index():
     """Homepage with recent public pastes"""
-    recent_pastes = Paste.query.filter_by(is_public=True).filter(
+    recent_pastes = with_author(Paste.query).filter_by(is_public=True).filter(
         (Paste.expires_at.is_(None)) | (Paste.expires_at > datetime.utcnow())
     ).order_by(Paste.created_at.desc()).limit(10).all()
     return render_template('index.html', pastes=recent_pastes)
@@ -271,6 +598,8 @@ def new_paste():
             is_public=form.is_public.data,
             user_id=current_user.id if current_user.is_authenticated else None
         )
+        if app.config['RENDER_ON_WRITE']:
+            paste.store_rendered()
         db.session.add(paste)
         db.session.commit()
         flash('Paste created successfully!', 'success')
@@ -292,16 +621,15 @@ def view_paste(paste_id):
         if not current_user.is_authenticated or current_user.id != paste.user_id:
             abort(404)
 
-    # Increment view count
-    paste.views += 1
-    db.session.commit()
+    # Count the view; it is written back in batches off the request path
+    view_counter.record(paste.id)
 
     return render_template('view_paste.html', paste=paste)
 
 @app.route('/paste/<paste_id>/raw')
 def raw_paste(paste_id):
     """View raw paste content"""
-    paste = Paste.query.get_or_404(paste_id)
+    paste = without_content(Paste.query).get_or_404(paste_id)
 
     if paste.is_expired():
         abort(404)
@@ -310,7 +638,26 @@ def raw_paste(paste_id):
         if not current_user.is_authenticated or current_user.id != paste.user_id:
             abort(404)
 
-    return paste.content, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    # Compressed representations get their own strong tag
+    headers = {'Vary': 'Accept-Encoding'}
+    etags = [paste.blob_hash] + [f'{paste.blob_hash}-{coding}' for coding in sorted(HTTP_CODINGS)]
+    etag = matching_etag(paste, etags)
+    if etag:
+        return not_modified(paste, etag, headers)
+
+    blob = paste.blob
+    if blob.encoding in HTTP_CODINGS and request.accept_encodings[blob.encoding]:
+        # Send the stored compressed bytes as they are
+        headers['Content-Encoding'] = blob.encoding
+        body = blob.data
+        etag = f'{paste.blob_hash}-{blob.encoding}'
+    else:
+        body = paste.content.encode('utf-8')
+        etag = paste.blob_hash
+
+    response = Response(body, mimetype='text/plain', headers=headers)
+    with_validators(response, paste, etag)
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(body))
 
 @app.route('/paste/<paste_id>/preview')
 def preview_paste(paste_id):
@@ -439,7 +786,7 @@ def logout():
 @login_required
 def my_pastes():
     """View user's pastes"""
-    pastes = Paste.query.filter_by(user_id=current_user.id).order_by(
+    pastes = with_author(Paste.query).filter_by(user_id=current_user.id).order_by(
         Paste.created_at.desc()
     ).all()
     return render_template('my_pastes.html', pastes=pastes)
@@ -484,7 +831,7 @@ def fork_paste(paste_id):
 @app.route('/api/paste/<paste_id>')
 def api_paste(paste_id):
     """API endpoint to get paste data as JSON"""
-    paste = Paste.query.get_or_404(paste_id)
+    paste = without_content(Paste.query).get_or_404(paste_id)
 
     if paste.is_expired():
         abort(404)
@@ -493,7 +840,11 @@ def api_paste(paste_id):
         if not current_user.is_authenticated or current_user.id != paste.user_id:
             abort(404)
 
-    return jsonify({
+    etag = paste.api_etag()
+    if matching_etag(paste, [etag]):
+        return not_modified(paste, etag)
+
+    return with_validators(jsonify({
         'id': paste.id,
         'title': paste.title,
         'content': paste.content,
@@ -503,7 +854,7 @@ def api_paste(paste_id):
         'is_public': paste.is_public,
         'views': paste.views,
         'author': paste.author.username if paste.author else None
-    })
+    }), paste, etag)
 
 @app.route('/search')
 def search():
@@ -513,13 +864,19 @@ def search():
         return render_template('search.html', pastes=[], query='')
 
     # Search in public pastes only
-    pastes = Paste.query.filter(
+    visible = with_author(Paste.query).filter(
         Paste.is_public == True,
-        (Paste.expires_at.is_(None)) | (Paste.expires_at > datetime.utcnow()),
-        (Paste.title.contains(query)) | (Paste.content.contains(query))
-    ).order_by(Paste.created_at.desc()).limit(50).all()
+        (Paste.expires_at.is_(None)) | (Paste.expires_at > datetime.utcnow())
+    )
 
-    return render_template('search.html', pastes=pastes, query=query)
+    ranked = search_index.search(visible, query)
+    if ranked is not None:
+        pastes, snippets = split_results(ranked.limit(50).all())
+    else:
+        pastes = substring_search(visible, query).order_by(Paste.created_at.desc()).limit(50).all()
+        snippets = {}
+
+    return render_template('search.html', pastes=pastes, query=query, snippets=snippets)
 
 
 
@@ -590,27 +947,57 @@ def api_complete_code():
         code = data['code']
         language = data.get('language', 'python')
 
-        completion = ai_helper.generate_code_completion(code, language)
+        def complete():
+            completion = ai_helper.generate_code_completion(code, language)
+            return {
+                'completion': completion,
+                'language': language,
+                'ai_powered': bool(ai_helper.api_token),
+                'available': bool(completion)
+            }
 
-        return jsonify({
-            'completion': completion,
-            'language': language,
-            'ai_powered': bool(ai_helper.api_token),
-            'available': bool(completion)
-        })
+        # Async mode hands the call to the job queue instead of holding this worker
+        if data.get('async') or request.args.get('async') in ('1', 'true'):
+            job = ai_jobs.submit(complete)
+            if job is None:
+                response = jsonify({'error': 'Too many completions queued, try again shortly'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            body = job_to_api(job)
+            body['status_url'] = url_for('api_ai_job', job_id=job['id'])
+            response = jsonify(body)
+            response.headers['Location'] = body['status_url']
+            return response, 202
+
+        return jsonify(complete())
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai/jobs/<job_id>')
+def api_ai_job(job_id):
+    """API endpoint to poll an async AI job; ?wait=N long-polls up to N seconds"""
+    wait = request.args.get('wait', 0, type=float)
+    job = ai_jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job_to_api(job))
+
 @app.route('/api/ai/status')
 def api_ai_status():
     """API endpoint to check AI service status"""
     try:
+        # Answered from cached probes; stale entries are refreshed in the background
         available_models = ai_helper.get_available_models()
 
         return jsonify({
             'ai_enabled': bool(ai_helper.api_token),
             'available_models': available_models,
+            'models': ai_helper.model_status(),
+            'probe_ttl': ai_helper.probe_ttl,
+            'cache': ai_helper.cache.stats(),
+            'coalescing': ai_helper.inflight.stats(),
+            'jobs': ai_jobs.stats(),
             'features': {
                 'language_detection': True,
                 'code_explanation': True,
@@ -629,14 +1016,22 @@ def api_ai_status():
 
 @app.route('/api/v1/pastes', methods=['GET'])
 def api_list_pastes():
-    """API: List public pastes with pagination"""
+    """API: List public pastes with page or cursor pagination, or fetch ?ids=a,b,c"""
     try:
+        if 'ids' in request.args:
+            return multi_get(request.args['ids'].split(','),
+                             request.args.get('include_content', '1').lower() not in ('0', 'false'))
+
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)  # Max 100 per page
+        if per_page < 1:
+            per_page = 20  # the default paginate() also falls back to
         language = request.args.get('language')
         search = request.args.get('search')
+        cursor = request.args.get('cursor')
+        use_cursor = cursor is not None
 
-        query = Paste.query.filter(
+        query = with_author(Paste.query).filter(
             Paste.is_public == True,
             (Paste.expires_at.is_(None)) | (Paste.expires_at > datetime.utcnow())
         )
@@ -644,22 +1039,43 @@ def api_list_pastes():
         if language:
             query = query.filter(Paste.language == language)
 
-        if search:
-            query = query.filter(
-                db.or_(
-                    Paste.title.contains(search),
-                    Paste.content.contains(search)
-                )
+        query = query.order_by(Paste.created_at.desc(), Paste.id.desc())
+
+        # Cursor pages must follow (created_at, id) order, so search only filters there
+        ranked = search_index.search(query, search, order_by_rank=not use_cursor) if search else None
+        if ranked is not None:
+            query = ranked
+        elif search:
+            query = substring_search(query, search)
+
+        if use_cursor:
+            filtered = query
+            if cursor:
+                try:
+                    created_at, paste_id = decode_cursor(cursor)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                # Seek past the cursor using the (is_public, created_at, id) index
+                query = query.filter(db.or_(
+                    Paste.created_at < created_at,
+                    db.and_(Paste.created_at == created_at, Paste.id < paste_id)
+                ))
+            rows = query.limit(per_page + 1).all()
+            has_next = len(rows) > per_page
+            rows = rows[:per_page]
+        else:
+            paginated = query.paginate(
+                page=page, per_page=per_page, error_out=False
             )
+            rows = paginated.items
 
-        query = query.order_by(Paste.created_at.desc())
-
-        paginated = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        if ranked is not None:
+            items, snippets = split_results(rows)
+        else:
+            items, snippets = rows, {}
 
         pastes = []
-        for paste in paginated.items:
+        for paste in items:
             pastes.append({
                 'id': paste.id,
                 'title': paste.title,
@@ -669,13 +1085,24 @@ def api_list_pastes():
                 'views': paste.views,
                 'author': paste.author.username if paste.author else None,
                 'preview_available': paste.is_previewable(),
-                'content_length': len(paste.content),
+                'content_length': paste.size,
                 'url': url_for('view_paste', paste_id=paste.id, _external=True)
             })
+            if paste.id in snippets:
+                pastes[-1]['snippet'] = str(snippets[paste.id])
 
-        return jsonify({
-            'pastes': pastes,
-            'pagination': {
+        if use_cursor:
+            pagination = {
+                'per_page': per_page,
+                'cursor': cursor or None,
+                'has_next': has_next,
+                'next_cursor': encode_cursor(items[-1]) if has_next else None
+            }
+            if request.args.get('include_total', '').lower() in ('1', 'true', 'yes'):
+                pagination['total'] = cached_count(('pastes', language, search), filtered)
+                pagination['total_is_approximate'] = True
+        else:
+            pagination = {
                 'page': page,
                 'per_page': per_page,
                 'total': paginated.total,
@@ -684,7 +1111,11 @@ def api_list_pastes():
                 'has_prev': paginated.has_prev,
                 'next_page': page + 1 if paginated.has_next else None,
                 'prev_page': page - 1 if paginated.has_prev else None
-            },
+            }
+
+        return jsonify({
+            'pastes': pastes,
+            'pagination': pagination,
             'filters': {
                 'language': language,
                 'search': search
@@ -703,22 +1134,15 @@ def api_create_paste():
             return jsonify({'error': 'JSON data required'}), 400
 
         # Validate required fields
-        if 'content' not in data:
-            return jsonify({'error': 'Content is required'}), 400
-
-        if len(data['content']) > 1000000:  # 1MB limit
-            return jsonify({'error': 'Content too large (max 1MB)'}), 400
+        error = validate_paste_data(data)
+        if error:
+            return jsonify({'error': error}), 400
 
         # Create paste
-        paste = Paste(
-            title=data.get('title'),
-            content=data['content'],
-            language=data.get('language', 'text'),
-            expires_at=calculate_expiry(data.get('expires_in', 'never')),
-            is_public=data.get('is_public', True),
-            user_id=current_user.id if current_user.is_authenticated else None
-        )
+        paste = paste_from_data(data)
 
+        if app.config['RENDER_ON_WRITE']:
+            paste.store_rendered()
         db.session.add(paste)
         db.session.commit()
 
@@ -738,11 +1162,106 @@ def api_create_paste():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/v1/pastes/batch', methods=['POST'])
+def api_create_pastes_batch():
+    """API: Create many pastes in one transaction"""
+    try:
+        max_bytes = app.config['BATCH_MAX_BYTES']
+        if request.content_length and request.content_length > max_bytes:
+            return jsonify({'error': f'Batch too large (max {max_bytes} bytes)'}), 413
+        # Chunked bodies carry no Content-Length; read one byte past the limit to spot them
+        request.max_content_length = max_bytes + 1
+        if len(request.get_data(cache=True)) > max_bytes:
+            return jsonify({'error': f'Batch too large (max {max_bytes} bytes)'}), 413
+
+        data = request.get_json()
+        items = data.get('pastes') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'A non-empty array of pastes is required'}), 400
+
+        max_items = app.config['BATCH_MAX_ITEMS']
+        if len(items) > max_items:
+            return jsonify({'error': f'Too many pastes in batch (max {max_items})'}), 413
+
+        # Validate everything first; one bad item rejects the whole batch
+        errors = [(index, validate_paste_data(item)) for index, item in enumerate(items)]
+        errors = [{'index': index, 'error': error} for index, error in errors if error]
+        if errors:
+            return jsonify({
+                'error': f'{len(errors)} of {len(items)} pastes failed validation',
+                'results': errors
+            }), 400
+
+        pastes = [paste_from_data(item) for item in items]
+        insert_pastes(pastes)
+        db.session.commit()
+
+        return jsonify({
+            'created': len(pastes),
+            'results': [{
+                'index': index,
+                'id': paste.id,
+                'language': paste.language,
+                'created_at': paste.created_at.isoformat(),
+                'expires_at': paste.expires_at.isoformat() if paste.expires_at else None,
+                'is_public': paste.is_public,
+                'url': url_for('view_paste', paste_id=paste.id, _external=True),
+                'raw_url': url_for('raw_paste', paste_id=paste.id, _external=True),
+                'api_url': url_for('api_get_paste', paste_id=paste.id, _external=True)
+            } for index, paste in enumerate(pastes)]
+        }), 201
+
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Batch too large (max {max_bytes} bytes)'}), 413
+    except HTTPException as e:
+        # Malformed JSON and the like are client errors, not server errors
+        return jsonify({'error': e.description}), e.code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/v1/pastes/lookup', methods=['POST'])
+def api_lookup_pastes():
+    """API: Fetch many pastes by id, for id lists too long for a query string"""
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or not isinstance(data.get('ids'), list):
+            return jsonify({'error': 'JSON object with an "ids" array required'}), 400
+        return multi_get(data['ids'], bool(data.get('include_content', True)))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def multi_get(ids, include_content):
+    """Fetch every visible paste among ids in one query, preserving request order"""
+    ids = list(dict.fromkeys(str(paste_id).strip() for paste_id in ids if str(paste_id).strip()))
+    if not ids:
+        return jsonify({'error': 'At least one paste id is required'}), 400
+    max_ids = app.config['MULTIGET_MAX_IDS']
+    if len(ids) > max_ids:
+        return jsonify({'error': f'Too many ids (max {max_ids})'}), 400
+
+    query = with_author(Paste.query)
+    if not include_content:
+        query = without_content(query)
+    found = {paste.id: paste for paste in query.filter(Paste.id.in_(ids)) if can_view(paste)}
+
+    # Fetching a body counts as a view, as with the single-paste endpoint
+    if include_content:
+        for paste_id in found:
+            view_counter.record(paste_id)
+
+    return jsonify({
+        'pastes': [paste_to_api(found[paste_id], include_content)
+                   for paste_id in ids if paste_id in found],
+        'missing': [paste_id for paste_id in ids if paste_id not in found]
+    })
+
 @app.route('/api/v1/pastes/<paste_id>', methods=['GET'])
 def api_get_paste(paste_id):
     """API: Get a specific paste"""
     try:
-        paste = Paste.query.get_or_404(paste_id)
+        paste = without_content(Paste.query).get_or_404(paste_id)
 
         if paste.is_expired():
             return jsonify({'error': 'Paste has expired'}), 404
@@ -751,29 +1270,15 @@ def api_get_paste(paste_id):
             if not current_user.is_authenticated or current_user.id != paste.user_id:
                 return jsonify({'error': 'Paste not found or access denied'}), 404
 
-        # Increment view count
-        paste.views += 1
-        db.session.commit()
+        # Count the view; it is written back in batches off the request path
+        view_counter.record(paste.id)
 
-        return jsonify({
-            'id': paste.id,
-            'title': paste.title,
-            'content': paste.content,
-            'language': paste.language,
-            'created_at': paste.created_at.isoformat(),
-            'expires_at': paste.expires_at.isoformat() if paste.expires_at else None,
-            'is_public': paste.is_public,
-            'views': paste.views,
-            'author': paste.author.username if paste.author else None,
-            'preview_available': paste.is_previewable(),
-            'preview_type': paste.get_preview_type(),
-            'content_length': len(paste.content),
-            'urls': {
-                'view': url_for('view_paste', paste_id=paste.id, _external=True),
-                'raw': url_for('raw_paste', paste_id=paste.id, _external=True),
-                'preview': url_for('preview_paste', paste_id=paste.id, _external=True) if paste.is_previewable() else None
-            }
-        })
+        # View counts are not part of the validator, so a 304 may carry a stale count
+        etag = paste.api_etag()
+        if matching_etag(paste, [etag]):
+            return not_modified(paste, etag)
+
+        return with_validators(jsonify(paste_to_api(paste)), paste, etag)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -792,17 +1297,27 @@ def api_update_paste(paste_id):
         if not data:
             return jsonify({'error': 'JSON data required'}), 400
 
+        if 'content' in data and len(data['content']) > 1000000:
+            return jsonify({'error': 'Content too large (max 1MB)'}), 400
+
+        # Drop stale renderings before the content or language changes
+        if ('content' in data and data['content'] != paste.content) or \
+                ('language' in data and data['language'] != paste.language):
+            paste.invalidate_rendered()
+
         # Update allowed fields
         if 'title' in data:
             paste.title = data['title']
         if 'content' in data:
-            if len(data['content']) > 1000000:
-                return jsonify({'error': 'Content too large (max 1MB)'}), 400
             paste.content = data['content']
         if 'language' in data:
             paste.language = data['language']
         if 'is_public' in data:
             paste.is_public = data['is_public']
+        paste.updated_at = datetime.utcnow()
+
+        if app.config['RENDER_ON_WRITE'] and ('content' in data or 'language' in data):
+            paste.store_rendered()
 
         db.session.commit()
 
@@ -810,7 +1325,7 @@ def api_update_paste(paste_id):
             'id': paste.id,
             'title': paste.title,
             'language': paste.language,
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': paste.updated_at.isoformat(),
             'is_public': paste.is_public,
             'preview_available': paste.is_previewable()
         })
@@ -861,46 +1376,88 @@ def api_get_languages():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/v1/export.ndjson', methods=['GET'])
+@app.route('/api/v1/export.ndjson.gz', methods=['GET'])
+def api_export_pastes():
+    """API: Stream public pastes as newline-delimited JSON, oldest first"""
+    try:
+        language = request.args.get('language')
+        since = parse_datetime_arg('since')
+        until = parse_datetime_arg('until')
+        cursor = request.args.get('cursor')
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    window_size = app.config['EXPORT_WINDOW_SIZE']
+    started_at = datetime.utcnow()
+
+    def records(position):
+        # One keyset-paginated window at a time, so memory stays flat for any table size
+        while True:
+            query = with_author(Paste.query).filter(
+                Paste.is_public == True,
+                (Paste.expires_at.is_(None)) | (Paste.expires_at > started_at)
+            )
+            if language:
+                query = query.filter(Paste.language == language)
+            if since:
+                query = query.filter(Paste.created_at >= since)
+            if until:
+                query = query.filter(Paste.created_at < until)
+            if position:
+                created_at, paste_id = position
+                query = query.filter(db.or_(
+                    Paste.created_at > created_at,
+                    db.and_(Paste.created_at == created_at, Paste.id > paste_id)
+                ))
+            window = query.order_by(Paste.created_at, Paste.id).limit(window_size).all()
+            if not window:
+                return
+            # Every line carries the cursor to resume after it
+            yield ''.join(
+                json.dumps(dict(paste_to_api(paste), cursor=encode_cursor(paste))) + '\n'
+                for paste in window
+            )
+            position = (window[-1].created_at, window[-1].id)
+            db.session.expunge_all()
+            if len(window) < window_size:
+                return
+
+    if request.path.endswith('.gz'):
+        body, mimetype = gzip_stream(records(position)), 'application/gzip'
+    else:
+        body, mimetype = records(position), 'application/x-ndjson'
+    filename = request.path.rsplit('/', 1)[-1]
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=dustbin-{filename}'
+    })
+
 @app.route('/api/v1/stats', methods=['GET'])
 def api_get_stats():
     """API: Get platform statistics"""
     try:
-        total_pastes = Paste.query.count()
-        public_pastes = Paste.query.filter(Paste.is_public == True).count()
-        total_users = User.query.count()
-
-        # Language statistics
-        language_stats = db.session.query(
-            Paste.language,
-            db.func.count(Paste.id).label('count')
-        ).filter(
-            Paste.is_public == True
-        ).group_by(Paste.language).order_by(
-            db.func.count(Paste.id).desc()
-        ).limit(10).all()
-
-        # Recent activity (last 24 hours)
-        recent_pastes = Paste.query.filter(
-            Paste.created_at > datetime.utcnow() - timedelta(hours=24),
-            Paste.is_public == True
-        ).count()
+        # Served from rollup tables maintained on every paste write
+        stats = stats_rollup.snapshot()
 
         return jsonify({
-            'total_pastes': total_pastes,
-            'public_pastes': public_pastes,
-            'total_users': total_users,
-            'recent_pastes_24h': recent_pastes,
-            'top_languages': [
-                {'language': lang, 'count': count}
-                for lang, count in language_stats
-            ],
+            'total_pastes': stats['total_pastes'],
+            'public_pastes': stats['public_pastes'],
+            'total_users': site_counters.get('users'),
+            'recent_pastes_24h': stats['recent_pastes_24h'],
+            'top_languages': stats['top_languages'],
+            'hourly_pastes_24h': stats['hourly_pastes_24h'],
+            'computed_at': stats['computed_at'],
             'features': {
                 'syntax_highlighting': True,
                 'preview_support': True,
                 'ai_assistance': bool(ai_helper.api_token),
                 'user_accounts': True,
                 'paste_expiration': True
-            }
+            },
+            'render_cache': render_cache.stats(),
+            'view_counter': view_counter.stats(),
+            'expiry_reaper': expiry_reaper.stats()
         })
 
     except Exception as e:
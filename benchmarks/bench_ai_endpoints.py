@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+AI endpoint load benchmark for Dustbin
+Drives /api/ai/* at increasing concurrency against the local inference stand-in and reports throughput and latency percentiles
+"""
+
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hf_standin import start_stand_in
+
+ENDPOINTS = {
+    'detect-language': ('POST', '/api/ai/detect-language'),
+    'explain-code': ('POST', '/api/ai/explain-code'),
+    'complete-code': ('POST', '/api/ai/complete-code'),
+    'status': ('GET', '/api/ai/status'),
+}
+
+def start_dustbin(base_url, cache):
+    """Serve the app in-process with its AI client pointed at the stand-in"""
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ.setdefault('EXPIRY_REAPER_ENABLED', 'false')
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app, ai_helper
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args):
+            pass
+
+    ai_helper.base_url = base_url
+    ai_helper.api_token = ai_helper.api_token or 'benchmark'
+    ai_helper.cache.enabled = cache
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+def run_level(url, method, concurrency, total, distinct):
+    local = threading.local()
+
+    def call(index):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        # A small set of distinct snippets, as when many users open the same pastes
+        body = {'code': f'def handler_{index % distinct}(request):\n    return request', 'language': 'python'}
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, json=body if method == 'POST' else None, timeout=60)
+            ok = response.ok
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return total / elapsed, latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--url', help='base URL of a running Dustbin to load instead of an in-process one')
+    parser.add_argument('--endpoints', default='detect-language,explain-code,complete-code,status',
+                        help=f'comma-separated endpoints (default: all of {", ".join(ENDPOINTS)})')
+    parser.add_argument('--concurrency', default='1,4,16,32', help='client concurrency levels (default: 1,4,16,32)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per level (default: 200)')
+    parser.add_argument('--distinct', type=int, default=50, help='distinct code snippets sent (default: 50)')
+    parser.add_argument('--latency', type=float, default=200, help='stand-in mean latency in ms (default: 200)')
+    parser.add_argument('--jitter', type=float, default=50, help='stand-in latency deviation in ms (default: 50)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='stand-in 500 rate (default: 0)')
+    parser.add_argument('--loading-rate', type=float, default=0.0, help='stand-in 503 loading rate (default: 0)')
+    parser.add_argument('--payload-size', type=int, default=64, help='stand-in completion size (default: 64)')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the AI result cache on (default: off, so completions reach the stand-in)')
+    args = parser.parse_args()
+
+    stand_in = dustbin = None
+    base = args.url
+    if not base:
+        stand_in, models_url = start_stand_in(
+            latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+            loading_rate=args.loading_rate, payload_size=args.payload_size, seed=1
+        )
+        dustbin, base = start_dustbin(models_url, args.cache)
+        print(f"Stand-in at {models_url}: {args.latency:.0f}±{args.jitter:.0f} ms, "
+              f"{args.error_rate:.0%} errors, {args.loading_rate:.0%} loading")
+    print(f"{args.requests} requests per level against {base}\n")
+
+    print(f"{'endpoint':<18}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name in args.endpoints.split(','):
+        method, path = ENDPOINTS[name]
+        for concurrency in [int(level) for level in args.concurrency.split(',')]:
+            throughput, latencies, errors = run_level(base + path, method, concurrency,
+                                                      args.requests, args.distinct)
+            print(f"{name:<18}{concurrency:>6}{throughput:>10.1f}{percentile(latencies, 0.5):>10.2f}"
+                  f"{percentile(latencies, 0.95):>10.2f}{percentile(latencies, 0.99):>10.2f}{errors:>8}")
+
+    if stand_in:
+        print(f"\nStand-in served {stand_in.requests} upstream calls")
+        dustbin.shutdown()
+        stand_in.shutdown()
+
+if __name__ == "__main__":
+    main()
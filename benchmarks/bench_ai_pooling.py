@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Connection pooling benchmark for Dustbin
+Times Hugging Face client calls with a fresh connection per call versus the pooled session
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_cache import AICache
+from ai_helper import HuggingFaceAPI
+from hf_standin import start_stand_in
+
+def time_calls(call, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<12}{statistics.mean(ordered):>10.2f}{statistics.median(ordered):>10.2f}{p95:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--calls', type=int, default=200, help='calls per mode (default: 200)')
+    parser.add_argument('--base-url', help='models URL to benchmark instead of the built-in stand-in, '
+                                           'e.g. https://api-inference.huggingface.co/models')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_stand_in()
+
+    # Without a cache every call reaches the server
+    api = HuggingFaceAPI(cache=AICache(path=None, enabled=False))
+    api.api_token = api.api_token or 'benchmark'
+    api.base_url = base_url
+    url = f"{base_url}/{api.models['code_completion']}"
+    payload = {'inputs': '# python\nx = 1', 'parameters': {'max_length': 100}}
+    headers = dict(api.session.headers)
+
+    def unpooled():
+        requests.post(url, headers=headers, json=payload, timeout=30)
+
+    def pooled():
+        api.generate_code_completion('x = 1')
+
+    print(f"{args.calls} calls per mode against {base_url}\n")
+    print(f"{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    report('unpooled', time_calls(unpooled, args.calls))
+    report('pooled', time_calls(pooled, args.calls))
+
+    if server:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compression benchmark for Dustbin
+Compares blob codecs by stored size and CPU time on a corpus of paste-like text
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blob_store import CODECS
+
+TEXT_EXTENSIONS = {'.py', '.js', '.ts', '.html', '.css', '.json', '.md', '.txt', '.yml',
+                   '.yaml', '.toml', '.sql', '.sh', '.rs', '.go', '.c', '.h', '.java'}
+MAX_PASTE_BYTES = 1024 * 1024
+
+def load_directory(root):
+    """Read text files under root the way they would be pasted"""
+    bodies = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in ('__pycache__', 'venv', 'node_modules')]
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in TEXT_EXTENSIONS:
+                continue
+            try:
+                with open(os.path.join(dirpath, filename), encoding='utf-8') as f:
+                    body = f.read()
+            except (UnicodeDecodeError, OSError):
+                continue
+            if body and len(body.encode('utf-8')) <= MAX_PASTE_BYTES:
+                bodies.append(body.encode('utf-8'))
+    return bodies
+
+def load_database():
+    """Read every distinct paste body from the configured database"""
+    from app import app, PasteBlob
+    with app.app_context():
+        return [blob.text.encode('utf-8') for blob in PasteBlob.query.yield_per(200)]
+
+def measure(bodies, codec, level, threshold, repeat):
+    compress, decompress = CODECS[codec]
+    raw_total = sum(len(body) for body in bodies)
+    stored = 0
+    compress_seconds = 0.0
+    decompress_seconds = 0.0
+    for body in bodies:
+        if len(body) < threshold:
+            stored += len(body)
+            continue
+        started = time.perf_counter()
+        for _ in range(repeat):
+            packed = compress(body, level)
+        compress_seconds += (time.perf_counter() - started) / repeat
+        if len(packed) >= len(body):
+            stored += len(body)
+            continue
+        stored += len(packed)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            decompress(packed)
+        decompress_seconds += (time.perf_counter() - started) / repeat
+    mb = raw_total / (1024 * 1024)
+    return {
+        'ratio': raw_total / stored if stored else 0,
+        'saved_pct': 100 * (raw_total - stored) / raw_total if raw_total else 0,
+        'compress_mb_s': mb / compress_seconds if compress_seconds else float('inf'),
+        'decompress_mb_s': mb / decompress_seconds if decompress_seconds else float('inf'),
+        'decompress_ms_per_paste': 1000 * decompress_seconds / len(bodies) if bodies else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--corpus', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='directory of text files to use as pastes (default: this repository)')
+    parser.add_argument('--database', action='store_true',
+                        help='use the paste bodies in the configured database instead')
+    parser.add_argument('--threshold', type=int, default=1024,
+                        help='only compress bodies of at least this many bytes (default: 1024)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing repetitions per body (default: 3)')
+    args = parser.parse_args()
+
+    bodies = load_database() if args.database else load_directory(args.corpus)
+    if not bodies:
+        print("❌ Corpus is empty")
+        return 1
+    total = sum(len(body) for body in bodies)
+    above = sum(1 for body in bodies if len(body) >= args.threshold)
+    print(f"Corpus: {len(bodies)} pastes, {total / 1024:.0f} KiB, "
+          f"{above} at or above the {args.threshold} byte threshold\n")
+
+    print(f"{'codec':<10}{'level':>6}{'ratio':>8}{'saved':>9}{'compress':>14}{'decompress':>14}{'ms/paste':>10}")
+    for codec, levels in (('gzip', (1, 6, 9)), ('deflate', (1, 6, 9)), ('lzma', (0, 6))):
+        for level in levels:
+            result = measure(bodies, codec, level, args.threshold, args.repeat)
+            print(f"{codec:<10}{level:>6}{result['ratio']:>7.2f}x{result['saved_pct']:>8.1f}%"
+                  f"{result['compress_mb_s']:>9.1f} MB/s{result['decompress_mb_s']:>9.1f} MB/s"
+                  f"{result['decompress_ms_per_paste']:>10.3f}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
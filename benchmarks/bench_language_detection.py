@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Language detection benchmark for Dustbin
+Compares the compiled pattern table with the original per-call scan and a pure-Python Aho-Corasick automaton
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_helper import LANGUAGE_PATTERNS, language_patterns
+from bench_compression import load_directory
+
+def original_detect(code):
+    """The detector as it was: lowercase, then one scan per pattern per language"""
+    code_lower = code.lower()
+    scores = {}
+    for lang, patterns in LANGUAGE_PATTERNS.items():
+        score = sum(1 for pattern in patterns if pattern.lower() in code_lower)
+        if score > 0:
+            scores[lang] = score
+    if scores:
+        return max(scores, key=scores.get)
+    return "text"
+
+class AhoCorasick:
+    """Single-pass automaton over the lowercased text, kept for comparison"""
+
+    def __init__(self, table):
+        self.order = list(table)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [set()]
+        credits = {}
+        for language, patterns in table.items():
+            for pattern in patterns:
+                credits.setdefault(pattern.lower(), []).append(language)
+        self.credits = credits
+        for pattern in credits:
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(set())
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.out[state].add(pattern)
+        queue = deque(self.goto[0].values())
+        while queue:
+            parent = queue.popleft()
+            for char, state in self.goto[parent].items():
+                queue.append(state)
+                fallback = self.fail[parent]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[state] = target if target != state else 0
+                self.out[state] |= self.out[self.fail[state]]
+
+    def detect(self, code):
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        found = set()
+        for char in code.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        scores = {}
+        for pattern in found:
+            for language in self.credits[pattern]:
+                scores[language] = scores.get(language, 0) + 1
+        if not scores:
+            return "text"
+        return max(scores, key=lambda language: (scores[language], -self.order.index(language)))
+
+def per_call_ms(detect, code, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        detect(code)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--corpus', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='directory of source files to check agreement on (default: this repository)')
+    args = parser.parse_args()
+
+    automaton = AhoCorasick(LANGUAGE_PATTERNS)
+    detectors = {
+        'original': original_detect,
+        'compiled': lambda code: language_patterns.best(code) or "text",
+        'aho-corasick': automaton.detect,
+    }
+
+    bodies = [body.decode('utf-8') for body in load_directory(args.corpus)]
+    disagreements = sum(
+        1 for body in bodies
+        if len({detect(body) for detect in detectors.values()}) > 1
+    )
+    print(f"Agreement on {len(bodies)} corpus files: {len(bodies) - disagreements}/{len(bodies)}\n")
+
+    sample = '\n'.join(bodies) or 'def main():\n    print("hi")\n'
+    inputs = {
+        'snippet (60 B)': 'def main():\n    print("hello")\n    return 0\n'[:60],
+        '64 KiB': (sample * (65536 // len(sample) + 1))[:65536],
+        '1 MiB': (sample * (1048576 // len(sample) + 1))[:1048576],
+    }
+    print(f"{'input':<16}" + ''.join(f"{name + ' ms':>18}" for name in detectors))
+    for label, code in inputs.items():
+        repeat = 2000 if len(code) < 1000 else (50 if len(code) < 100000 else 5)
+        print(f"{label:<16}" + ''.join(
+            f"{per_call_ms(detect, code, repeat):>18.4f}" for detect in detectors.values()
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Markdown preview benchmark for Dustbin
+Times the original per-call pipeline against reused per-thread converters (cold) and cached previews (warm)
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import bleach
+import markdown
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdown_renderer import MarkdownRenderer, EXTENSIONS, ALLOWED_TAGS, ALLOWED_ATTRIBUTES
+from render_cache import RenderCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def original_preview(content):
+    """The preview as it was: a new converter and allow-lists on every call"""
+    md = markdown.Markdown(extensions=list(EXTENSIONS))
+    html = md.convert(content)
+    return bleach.clean(html, tags=list(ALLOWED_TAGS), attributes=dict(ALLOWED_ATTRIBUTES))
+
+def per_call_ms(render, content, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render(content)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=50, help='renders per measurement (default: 50)')
+    parser.add_argument('files', nargs='*', help='Markdown files to render (default: the repository docs)')
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(ROOT, '*.md')) + glob.glob(os.path.join(ROOT, 'docs', '*.md')))
+    renderer = MarkdownRenderer()
+    cached = MarkdownRenderer(RenderCache())
+    modes = {
+        'original': original_preview,
+        'reused (cold)': renderer.convert,
+        'cached (warm)': cached.render,
+    }
+
+    documents = {} if args.files else {'(snippet)': '# Notes\n\nA *short* paste with `code`.\n'}
+    for path in files:
+        with open(path, encoding='utf-8') as f:
+            documents[os.path.relpath(path, ROOT)] = f.read()
+
+    print(f"{'document':<28}{'KiB':>8}" + ''.join(f"{name + ' ms':>18}" for name in modes))
+    for label, content in documents.items():
+        assert renderer.convert(content) == original_preview(content)
+        cached.render(content)
+        print(f"{label:<28}{len(content) / 1024:>8.1f}" + ''.join(
+            f"{per_call_ms(render, content, args.repeat):>18.4f}" for render in modes.values()
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Blob store for Dustbin
+Content-addressed, reference-counted storage for paste bodies
+"""
+
+import gzip
+import lzma
+import zlib
+from collections import Counter
+from typing import Dict, Any, Optional
+from sqlalchemy import event, inspect, update, insert, delete, select, func
+
+# Codec name -> (compress(data, level), decompress(data))
+CODECS = {
+    'gzip': (lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), gzip.decompress),
+    'deflate': (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+
+# Codecs whose stored bytes are a valid HTTP Content-Encoding as they are
+HTTP_CODINGS = {'gzip', 'deflate'}
+
+# Characters of every body kept uncompressed for listings
+PREVIEW_CHARS = 200
+
+
+def decode(encoding: Optional[str], data: bytes) -> str:
+    """Turn stored compressed bytes back into the paste body"""
+    return CODECS[encoding][1](data).decode('utf-8')
+
+
+class BlobStore:
+    """Keeps paste_blob rows and their reference counts in step with pastes"""
+
+    def __init__(self, codec: str = 'gzip', threshold: int = 1024, level: int = 6):
+        self.db = None
+        self.model = None
+        self.table = None
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+
+    def init_app(self, app, db, paste_model, blob_model):
+        self.db = db
+        self.model = paste_model
+        self.table = blob_model.__table__
+        self.codec = app.config.get('BLOB_CODEC', self.codec)
+        self.threshold = app.config.get('BLOB_COMPRESS_THRESHOLD', self.threshold)
+        self.level = app.config.get('BLOB_COMPRESS_LEVEL', self.level)
+        if self.codec != 'none' and self.codec not in CODECS:
+            raise ValueError(f"Unknown BLOB_CODEC {self.codec!r}, expected one of "
+                             f"{', '.join(['none', *CODECS])}")
+        event.listen(paste_model, 'before_insert', self._before_insert)
+        event.listen(paste_model, 'before_update', self._before_update)
+        event.listen(paste_model, 'after_delete', self._after_delete)
+
+    def encode(self, content: str) -> Dict[str, Any]:
+        """Column values for a body, compressed when it is large enough to pay off"""
+        raw = content.encode('utf-8')
+        values = {'content': content, 'data': None, 'encoding': None, 'size': len(raw),
+                  'preview': content[:PREVIEW_CHARS]}
+        if self.codec != 'none' and len(raw) >= self.threshold:
+            packed = CODECS[self.codec][0](raw, self.level)
+            # Incompressible bodies are kept as plain text
+            if len(packed) < len(raw):
+                values.update(content='', data=packed, encoding=self.codec)
+        return values
+
+    def acquire(self, connection, digest: str, content: str, count: int = 1):
+        """Take references to a body, storing it only if it is new"""
+        result = connection.execute(update(self.table).where(
+            self.table.c.hash == digest
+        ).values(refcount=self.table.c.refcount + count))
+        if result.rowcount == 0:
+            connection.execute(insert(self.table).values(
+                hash=digest, refcount=count, **self.encode(content)
+            ))
+
+    def add(self, connection, pastes):
+        """Take references for pastes inserted outside the ORM, once per distinct body"""
+        bodies = {paste.blob_hash: paste.content for paste in pastes}
+        for digest, count in Counter(paste.blob_hash for paste in pastes).items():
+            self.acquire(connection, digest, bodies[digest], count)
+
+    def release(self, connection, digests: Counter):
+        """Drop references and garbage-collect bodies nobody points at"""
+        for digest, count in digests.items():
+            connection.execute(update(self.table).where(
+                self.table.c.hash == digest
+            ).values(refcount=self.table.c.refcount - count))
+        if digests:
+            connection.execute(delete(self.table).where(
+                self.table.c.hash.in_(list(digests)), self.table.c.refcount <= 0
+            ))
+
+    def _before_insert(self, mapper, connection, target):
+        self.acquire(connection, target.blob_hash, target.content)
+
+    def _before_update(self, mapper, connection, target):
+        history = inspect(target).attrs.blob_hash.history
+        if not history.has_changes():
+            return
+        self.acquire(connection, target.blob_hash, target.content)
+        self.release(connection, Counter(digest for digest in history.deleted if digest))
+
+    def _after_delete(self, mapper, connection, target):
+        self.release(connection, Counter([target.blob_hash]))
+
+    def remove(self, connection, paste_ids):
+        """Release the bodies of pastes about to be bulk-deleted outside the ORM"""
+        Paste = self.model
+        rows = connection.execute(select(Paste.blob_hash).where(Paste.id.in_(paste_ids))).all()
+        self.release(connection, Counter(digest for digest, in rows))
+
+    def compress_existing(self, batch_size: int = 200) -> int:
+        """Compress plain blobs written before compression was enabled, one transaction per batch"""
+        blobs = self.table
+        compressed = 0
+        after_hash = ''
+        while True:
+            with self.db.engine.begin() as connection:
+                rows = connection.execute(select(blobs.c.hash, blobs.c.content).where(
+                    blobs.c.encoding.is_(None), blobs.c.size >= self.threshold,
+                    blobs.c.hash > after_hash
+                ).order_by(blobs.c.hash).limit(batch_size)).all()
+                for digest, content in rows:
+                    values = self.encode(content)
+                    if values['encoding']:
+                        connection.execute(update(blobs).where(blobs.c.hash == digest).values(
+                            content=values['content'], data=values['data'],
+                            encoding=values['encoding']
+                        ))
+                        compressed += 1
+            if not rows:
+                return compressed
+            after_hash = rows[-1][0]
+
+    def fill_previews(self, batch_size: int = 200) -> int:
+        """Store listing previews for blobs written before the preview column existed"""
+        blobs = self.table
+        filled = 0
+        while True:
+            with self.db.engine.begin() as connection:
+                rows = connection.execute(select(
+                    blobs.c.hash, blobs.c.content, blobs.c.data, blobs.c.encoding
+                ).where(blobs.c.preview.is_(None)).limit(batch_size)).all()
+                for digest, content, data, encoding in rows:
+                    text = decode(encoding, data) if encoding else content
+                    connection.execute(update(blobs).where(blobs.c.hash == digest).values(
+                        preview=text[:PREVIEW_CHARS]
+                    ))
+                filled += len(rows)
+            if not rows:
+                return filled
+
+    def report(self) -> Dict[str, Any]:
+        """Compare the bytes pastes reference with the bytes actually stored"""
+        blobs = self.table
+        logical, distinct, stored, count, compressed, references = self.db.session.execute(select(
+            func.coalesce(func.sum(blobs.c.size * blobs.c.refcount), 0),
+            func.coalesce(func.sum(blobs.c.size), 0),
+            func.coalesce(func.sum(func.coalesce(func.length(blobs.c.data), blobs.c.size)), 0),
+            func.count(),
+            func.count(blobs.c.encoding),
+            func.coalesce(func.sum(blobs.c.refcount), 0)
+        )).one()
+        return {
+            'blobs': count,
+            'compressed_blobs': compressed,
+            'references': references,
+            'logical_bytes': logical,
+            'stored_bytes': stored,
+            'dedup_bytes_saved': logical - distinct,
+            'compression_bytes_saved': distinct - stored,
+            'bytes_saved': logical - stored
+        }
+
+
+# Global blob store instance
+blob_store = BlobStore()
@@ -2,9 +2,11 @@
 """
 Database creation script for Dustbin
 Creates all tables with the correct schema including new columns
+Run with --upgrade to add new tables, columns and indexes to an existing database
 """
 
-from app import app, db, User, Paste
+import sys
+from app import app, db, User, Paste, site_counters, stats_rollup
 
 def create_database():
     """Create all database tables"""
@@ -30,7 +32,7 @@ def create_database():
             print(f"Paste table columns: {columns}")
             
             # Verify required columns exist
-            required_columns = ['id', 'title', 'content', 'language', 'created_at',
+            required_columns = ['id', 'title', 'blob_hash', 'language', 'created_at',
                               'expires_at', 'is_public', 'user_id', 'views']
             missing_columns = [col for col in required_columns if col not in columns]
             
@@ -45,8 +47,51 @@ def create_database():
         print("✅ Database created successfully!")
         return True
 
+def upgrade_database():
+    """Add missing tables, columns and indexes without dropping existing data"""
+    print("Upgrading database schema...")
+
+    with app.app_context():
+        # Creates tables that do not exist yet, leaves existing ones alone
+        db.create_all()
+
+        # create_all() also skips new nullable columns on tables that already existed
+        inspector = db.inspect(db.engine)
+        with db.engine.begin() as connection:
+            for table in db.metadata.sorted_tables:
+                existing = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing or not column.nullable:
+                        continue
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    )
+                    print(f"Added column {table.name}.{column.name}")
+
+        # create_all() skips indexes on tables that already existed
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+        print("Created missing tables and indexes")
+
+        # Recount maintained totals and rollups for data written before they existed
+        site_counters.refresh()
+        stats_rollup.rebuild()
+        print("Rebuilt site counters and stats rollups")
+
+        inspector = db.inspect(db.engine)
+        print(f"Tables: {inspector.get_table_names()}")
+        print(f"Paste indexes: {[ix['name'] for ix in inspector.get_indexes('paste')]}")
+
+        print("✅ Database upgraded successfully!")
+        return True
+
 if __name__ == "__main__":
-    success = create_database()
+    if '--upgrade' in sys.argv[1:]:
+        success = upgrade_database()
+    else:
+        success = create_database()
     if success:
         print("\n🎉 Database is ready!")
         print("You can now run: python app.py")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Expiry reaper for Dustbin
+Deletes expired pastes in the background in small, bounded batches
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+
+class ExpiryReaper:
+    """Background thread that purges expired pastes batch by batch"""
+
+    def __init__(self, interval: float = 60.0, batch_size: int = 500):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.app = None
+        self.db = None
+        self.model = None
+        self.purge = None
+        self._thread = None
+        self._stop = threading.Event()
+        # Guards _thread; start() is called from request threads
+        self._thread_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self.total_deleted = 0
+        self.last_run_at = None
+        self.last_run_batches = []
+
+    def init_app(self, app, db, model, purge):
+        """Bind to the app; purge(ids) must delete the pastes and their side rows"""
+        self.app = app
+        self.db = db
+        self.model = model
+        self.purge = purge
+        self.interval = app.config.get('EXPIRY_REAPER_INTERVAL', self.interval)
+        self.batch_size = app.config.get('EXPIRY_REAPER_BATCH_SIZE', self.batch_size)
+
+    def reap_batch(self, now: datetime) -> int:
+        """Delete up to batch_size pastes that expired before now"""
+        Paste = self.model
+        ids = [row[0] for row in self.db.session.query(Paste.id).filter(
+            Paste.expires_at <= now
+        ).order_by(Paste.expires_at).limit(self.batch_size)]
+        if ids:
+            self.purge(ids)
+        self.db.session.commit()
+        return len(ids)
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """Reap until no expired pastes remain; one short transaction per batch"""
+        batches = []
+        with self._run_lock, self.app.app_context():
+            now = datetime.utcnow()
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    deleted = self.reap_batch(now)
+                except Exception as e:
+                    self.db.session.rollback()
+                    print(f"Error reaping expired pastes: {e}")
+                    break
+                elapsed = time.perf_counter() - started
+                if deleted:
+                    batches.append({'deleted': deleted, 'seconds': round(elapsed, 4)})
+                    print(f"Reaped {deleted} expired pastes in {elapsed * 1000:.1f}ms")
+                if deleted < self.batch_size:
+                    break
+
+        self.total_deleted += sum(batch['deleted'] for batch in batches)
+        self.last_run_at = datetime.utcnow()
+        self.last_run_batches = batches
+        return batches
+
+    def start(self):
+        """Start the background thread if it is not already running"""
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='expiry-reaper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self._thread is not None,
+            'interval': self.interval,
+            'batch_size': self.batch_size,
+            'total_deleted': self.total_deleted,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_run_batches': self.last_run_batches
+        }
+
+
+# Global reaper instance
+expiry_reaper = ExpiryReaper()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Hugging Face inference stand-in for Dustbin
+Local server mimicking the inference API for offline load tests and benchmarks
+
+Point Dustbin at it with HF_BASE_URL=http://127.0.0.1:8081/models
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers GET /models/<name> probes and POST /models/<name> inference calls"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def send_json(self, status: int, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_model(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        with server.lock:
+            server.requests += 1
+            roll = server.random.random()
+            delay = max(0.0, server.random.gauss(server.latency, server.jitter))
+        time.sleep(delay)
+
+        model = self.path.split('/models/', 1)[-1]
+        if not self.path.startswith('/models/') or not model:
+            self.send_json(404, {'error': 'Model not found'})
+        elif roll < server.loading_rate:
+            self.send_json(503, {'error': f'Model {model} is currently loading',
+                                 'estimated_time': 20.0})
+        elif roll < server.loading_rate + server.error_rate:
+            self.send_json(500, {'error': 'Internal Server Error'})
+        elif self.command == 'GET':
+            self.send_json(200, {'modelId': model, 'pipeline_tag': 'text-generation'})
+        else:
+            self.send_json(200, [{'generated_text': server.generated_text}])
+
+    do_GET = do_POST = handle_model
+
+    def log_message(self, *args):
+        pass
+
+
+def make_stand_in(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                  jitter: float = 0.0, error_rate: float = 0.0, loading_rate: float = 0.0,
+                  payload_size: int = 64, seed: Optional[int] = None) -> ThreadingHTTPServer:
+    """Build a stand-in server; latency and jitter are in seconds, rates are 0-1"""
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.loading_rate = loading_rate
+    server.generated_text = ('return result\n' * (payload_size // 14 + 1))[:payload_size]
+    server.random = random.Random(seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    return server
+
+
+def start_stand_in(**options):
+    """Serve a stand-in from a background thread; returns (server, models base URL)"""
+    server = make_stand_in(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f'http://{host}:{port}/models'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the Hugging Face inference API')
+    parser.add_argument('--host', default='127.0.0.1', help='address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8081, help='port to listen on (default: 8081)')
+    parser.add_argument('--latency', type=float, default=200, help='mean response latency in ms (default: 200)')
+    parser.add_argument('--jitter', type=float, default=50, help='latency standard deviation in ms (default: 50)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered 500 (default: 0)')
+    parser.add_argument('--loading-rate', type=float, default=0.0,
+                        help='fraction of calls answered 503 "model loading" (default: 0)')
+    parser.add_argument('--payload-size', type=int, default=64,
+                        help='characters of generated text per completion (default: 64)')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible error patterns')
+    args = parser.parse_args()
+
+    server = make_stand_in(args.host, args.port, args.latency / 1000, args.jitter / 1000,
+                           args.error_rate, args.loading_rate, args.payload_size, args.seed)
+    print(f"🤖 Hugging Face stand-in on http://{args.host}:{args.port}/models")
+    print(f"   Set HF_BASE_URL=http://{args.host}:{args.port}/models to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Bulk import script for Dustbin
+Imports a directory tree, tarball or NDJSON dump as pastes, inferring languages from file extensions
+Re-running the same command resumes after the last committed chunk
+"""
+
+import argparse
+import gzip
+import json
+import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from app import app, db, User, Paste, ImportProgress, insert_pastes
+from language_registry import language_registry
+
+MAX_CONTENT_LENGTH = 1000000  # same limit as the API
+
+def infer_language(name):
+    """Map a file name to a language id through the extensions in languages.json"""
+    extension = os.path.splitext(name or '')[1]
+    lang = language_registry.for_extension(extension) if extension else None
+    return lang['id'] if lang else 'text'
+
+def parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+def source_kind(source):
+    if os.path.isdir(source):
+        return 'directory'
+    if source.endswith(('.ndjson', '.jsonl', '.ndjson.gz', '.jsonl.gz')):
+        return 'ndjson'
+    if tarfile.is_tarfile(source):
+        return 'tarball'
+    raise ValueError(f"Don't know how to import {source} (expected a directory, tarball or .ndjson)")
+
+def read_file(path):
+    """Read one file, or None if it is too large to be a paste"""
+    try:
+        if os.path.getsize(path) > MAX_CONTENT_LENGTH * 4:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def directory_entries(root):
+    """Yield (relative name, path) for every file, in a stable order so imports can resume"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, root), path
+
+def read_directory(root, skip, chunk_size, pool):
+    entries = islice(directory_entries(root), skip, None)
+    while True:
+        chunk = list(islice(entries, chunk_size))
+        if not chunk:
+            return
+        # Files are read in parallel; map() keeps them in walk order
+        contents = pool.map(read_file, [path for _, path in chunk])
+        yield [{'title': name, 'data': data} for (name, _), data in zip(chunk, contents)]
+
+def read_tarball(path, skip, chunk_size, pool):
+    # Streaming mode reads members in archive order without seeking
+    with tarfile.open(path, 'r|*') as tar:
+        chunk = []
+        position = 0
+        for member in tar:
+            if not member.isfile():
+                continue
+            position += 1
+            if position <= skip:
+                continue
+            data = None
+            if member.size <= MAX_CONTENT_LENGTH * 4:
+                data = tar.extractfile(member).read()
+            chunk.append({'title': member.name, 'data': data})
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def parse_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+def read_ndjson(path, skip, chunk_size, pool):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        lines = islice(f, skip, None)
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield [parse_record(line) for line in chunk]
+
+READERS = {'directory': read_directory, 'tarball': read_tarball, 'ndjson': read_ndjson}
+
+def build_paste(entry, is_public, user_id=None):
+    """Turn a source entry into a new paste, or None if it cannot be one"""
+    if entry is None:
+        return None
+    content = entry.get('content')
+    if content is None and entry.get('data') is not None:
+        try:
+            content = entry['data'].decode('utf-8')
+        except UnicodeDecodeError:
+            return None  # binary file
+    if not isinstance(content, str) or not content or '\x00' in content \
+            or len(content) > MAX_CONTENT_LENGTH:
+        return None
+    # Dump fields of the wrong type would fail the whole chunk's INSERT, so skip the record
+    title, language = entry.get('title'), entry.get('language')
+    if title is not None and not isinstance(title, str):
+        return None
+    if language is not None and (not isinstance(language, str) or len(language) > 50):
+        return None
+    public = entry.get('is_public', is_public)
+    if not isinstance(public, bool):
+        return None
+    if not public and user_id is None:
+        return None  # only the owner may open a private paste, and it would have none
+    return Paste(
+        title=title[:200] if title is not None else None,
+        content=content,
+        language=language or infer_language(title),
+        is_public=public,
+        user_id=user_id,
+        created_at=parse_datetime(entry.get('created_at')),
+        expires_at=parse_datetime(entry.get('expires_at'))
+    )
+
+def import_source(source, chunk_size=1000, workers=8, is_public=True, restart=False, owner=None):
+    """Import a source in chunks, one transaction per chunk, recording progress as it goes
+
+    owner is the username the pastes are imported for; without one, private entries are skipped
+    """
+    kind = source_kind(source)
+    key = os.path.abspath(source)
+    if not is_public and owner is None:
+        raise ValueError("Private pastes need an owner to view them; pass --user")
+
+    with app.app_context():
+        db.create_all()
+        user_id = None
+        if owner is not None:
+            user = User.query.filter_by(username=owner).first()
+            if user is None:
+                raise ValueError(f"No user named {owner}")
+            user_id = user.id
+        progress = db.session.get(ImportProgress, key)
+        if progress is None:
+            progress = ImportProgress(source=key, position=0, imported=0)
+            db.session.add(progress)
+        elif restart:
+            progress.position = progress.imported = 0
+        elif progress.position:
+            print(f"Resuming after {progress.position} entries ({progress.imported} imported so far)")
+
+        print(f"Importing {kind} {source} in chunks of {chunk_size}")
+        started = time.perf_counter()
+        imported = skipped = imported_bytes = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for chunk in READERS[kind](source, progress.position, chunk_size, pool):
+                pastes = [paste for paste in (build_paste(entry, is_public, user_id) for entry in chunk)
+                          if paste]
+                if pastes:
+                    insert_pastes(pastes)
+                # The chunk and the progress marker commit together, so a rerun never duplicates
+                progress.position += len(chunk)
+                progress.imported += len(pastes)
+                progress.updated_at = datetime.utcnow()
+                db.session.commit()
+
+                imported += len(pastes)
+                skipped += len(chunk) - len(pastes)
+                imported_bytes += sum(len(paste.content.encode('utf-8')) for paste in pastes)
+                elapsed = time.perf_counter() - started
+                print(f"  {progress.position} entries: {imported / elapsed:.0f} rows/s, "
+                      f"{imported_bytes / elapsed / (1024 * 1024):.2f} MB/s")
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ Imported {imported} pastes ({imported_bytes / (1024 * 1024):.1f} MB) "
+              f"in {elapsed:.1f}s, skipped {skipped} entries")
+        if elapsed > 0:
+            print(f"Throughput: {imported / elapsed:.0f} rows/s, "
+                  f"{imported_bytes / elapsed / (1024 * 1024):.2f} MB/s")
+        return imported
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='directory, tarball (.tar, .tar.gz, ...) or NDJSON dump')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='pastes per transaction (default: 1000)')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='threads reading files in parallel (default: 8)')
+    parser.add_argument('--user', metavar='USERNAME',
+                        help='account that owns the imported pastes; required for private ones')
+    parser.add_argument('--private', action='store_true',
+                        help='import pastes as private unless the dump says otherwise (needs --user)')
+    parser.add_argument('--restart', action='store_true',
+                        help='ignore recorded progress and import from the beginning')
+    args = parser.parse_args()
+    try:
+        import_source(args.source, chunk_size=args.chunk_size, workers=args.workers,
+                      is_public=not args.private, restart=args.restart, owner=args.user)
+    except ValueError as e:
+        print(f"❌ {e}")
+        exit(1)
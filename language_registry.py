@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Language registry for Dustbin
+Loads the highlight/*.json configuration once and serves indexed lookups
+"""
+
+import os
+import json
+import threading
+import time
+from typing import Optional, Dict, List, Tuple, Any
+
+HIGHLIGHT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'highlight')
+
+# Used when languages.json is missing or unreadable
+FALLBACK_LANGUAGE_CONFIG = {
+    "languages": [
+        {"id": "text", "name": "Plain Text", "pygments_lexer": "text", "category": "text"},
+        {"id": "python", "name": "Python", "pygments_lexer": "python", "category": "programming"},
+        {"id": "javascript", "name": "JavaScript", "pygments_lexer": "javascript", "category": "web"},
+        {"id": "html", "name": "HTML", "pygments_lexer": "html", "category": "web"},
+        {"id": "css", "name": "CSS", "pygments_lexer": "css", "category": "web"},
+        {"id": "json", "name": "JSON", "pygments_lexer": "json", "category": "data"}
+    ],
+    "categories": {"text": "Text", "programming": "Programming", "web": "Web", "data": "Data"}
+}
+
+
+def _load_json(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class _Snapshot:
+    """Immutable, fully indexed view of the language configuration"""
+
+    def __init__(self, config: Dict[str, Any], popular: Dict[str, List[str]], themes: Dict[str, Any]):
+        self.config = config
+        self.popular = popular
+        self.themes = themes
+        self.by_id = {}
+        self.by_extension = {}
+        self.by_category = {}
+
+        for lang in config['languages']:
+            self.by_id[lang['id']] = lang
+            self.by_category.setdefault(lang.get('category', 'other'), []).append(lang)
+            for ext in lang.get('extensions', []):
+                # First declaration wins, matching the file's ordering
+                self.by_extension.setdefault(ext.lower(), lang)
+
+        self.choices = self._build_choices()
+        self.popular_choices = [
+            (lang_id, self.by_id[lang_id]['name'])
+            for lang_id in popular.get('popular_languages', [])
+            if lang_id in self.by_id
+        ]
+        self.themes_by_id = {theme['id']: theme for theme in themes.get('themes', [])}
+
+    def _build_choices(self) -> List[Tuple[str, str]]:
+        """Text first, then each category in id order with languages sorted by name"""
+        choices = []
+        categories = {
+            category: [(lang['id'], lang['name']) for lang in langs]
+            for category, langs in self.by_category.items()
+        }
+        if 'text' in categories:
+            choices.extend(categories.pop('text'))
+        for category_id in sorted(categories.keys()):
+            choices.extend(sorted(categories[category_id], key=lambda x: x[1]))
+        return choices
+
+
+class LanguageRegistry:
+    """In-memory language registry that reloads when the JSON files change"""
+
+    def __init__(self, config_dir: str = HIGHLIGHT_DIR, check_interval: float = 1.0):
+        self.config_dir = config_dir
+        self.check_interval = check_interval
+        self.paths = {
+            name: os.path.join(config_dir, f"{name}.json")
+            for name in ('languages', 'popular', 'themes')
+        }
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._mtimes = None
+        self._last_check = 0.0
+
+    def _current_mtimes(self):
+        return tuple(_mtime(path) for path in self.paths.values())
+
+    def reload(self) -> _Snapshot:
+        """Re-read the JSON files and swap in a freshly indexed snapshot"""
+        with self._lock:
+            mtimes = self._current_mtimes()
+            snapshot = _Snapshot(
+                _load_json(self.paths['languages'], FALLBACK_LANGUAGE_CONFIG),
+                _load_json(self.paths['popular'], {}),
+                _load_json(self.paths['themes'], {})
+            )
+            # Readers always see either the old or the new snapshot, never a mix
+            self._snapshot = snapshot
+            self._mtimes = mtimes
+            self._last_check = time.monotonic()
+            return snapshot
+
+    def snapshot(self) -> _Snapshot:
+        """Return the current snapshot, reloading if a config file changed"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if self._current_mtimes() != self._mtimes:
+                return self.reload()
+        return snapshot
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.snapshot().config
+
+    def get(self, language_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().by_id.get(language_id)
+
+    def for_extension(self, extension: str) -> Optional[Dict[str, Any]]:
+        """Look up a language by file extension, with or without the leading dot"""
+        extension = extension.lower()
+        if not extension.startswith('.'):
+            extension = '.' + extension
+        return self.snapshot().by_extension.get(extension)
+
+    def in_category(self, category: str) -> List[Dict[str, Any]]:
+        return list(self.snapshot().by_category.get(category, []))
+
+    def pygments_lexer(self, language_id: str) -> str:
+        lang = self.snapshot().by_id.get(language_id)
+        return lang['pygments_lexer'] if lang else 'text'
+
+    def choices(self) -> List[Tuple[str, str]]:
+        return self.snapshot().choices
+
+    def popular_choices(self) -> List[Tuple[str, str]]:
+        return self.snapshot().popular_choices
+
+    def theme(self, theme_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().themes_by_id.get(theme_id)
+
+
+# Global registry instance
+language_registry = LanguageRegistry()
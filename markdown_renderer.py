@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Markdown renderer for Dustbin
+Sanitized Markdown previews from reusable per-thread converters, cached by content hash
+"""
+
+import threading
+from typing import Optional
+import bleach
+import markdown
+from render_cache import RenderCache, content_hash, render_cache
+
+EXTENSIONS = ['codehilite', 'fenced_code', 'tables', 'toc', 'nl2br']
+
+ALLOWED_TAGS = frozenset([
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'p', 'br', 'strong', 'em', 'u', 's', 'del',
+    'ul', 'ol', 'li', 'blockquote', 'pre', 'code',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+    'a', 'img', 'hr', 'div', 'span'
+])
+
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'code': ['class'],
+    'div': ['class'],
+    'span': ['class'],
+    'pre': ['class']
+}
+
+# Bump when the extensions or the allow-lists change so cached previews are not reused
+PREVIEW_VERSION = 1
+
+
+class MarkdownRenderer:
+    """Markdown to sanitized HTML, keeping one converter and sanitizer per thread"""
+
+    def __init__(self, cache: Optional[RenderCache] = None):
+        self.cache = cache
+        # Neither markdown.Markdown nor bleach's Cleaner is safe to share across threads
+        self._local = threading.local()
+
+    def _pipeline(self):
+        pipeline = getattr(self._local, 'pipeline', None)
+        if pipeline is None:
+            converter = markdown.Markdown(extensions=EXTENSIONS)
+            cleaner = bleach.sanitizer.Cleaner(tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+            pipeline = self._local.pipeline = (converter, cleaner)
+        return pipeline
+
+    def convert(self, content: str) -> str:
+        """Render and sanitize, bypassing the cache"""
+        converter, cleaner = self._pipeline()
+        # reset() clears per-document state such as footnotes and the toc
+        html = converter.reset().convert(content)
+        return cleaner.clean(html)
+
+    @staticmethod
+    def make_key(digest: str):
+        return RenderCache.make_key(digest, 'markdown', f'preview-v{PREVIEW_VERSION}', False)
+
+    def render(self, content: str, digest: Optional[str] = None) -> str:
+        """Sanitized HTML for the content, from the cache when it has been rendered before"""
+        if self.cache is None:
+            return self.convert(content)
+        key = self.make_key(digest or content_hash(content))
+        html = self.cache.get(key)
+        if html is None:
+            html = self.convert(content)
+            self.cache.put(key, html)
+        return html
+
+
+# Global Markdown renderer instance
+markdown_renderer = MarkdownRenderer(render_cache)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Blob migration script for Dustbin
+Moves inline paste bodies into deduplicated, content-addressed blobs
+Run with --compress to compress large blobs stored before compression was enabled
+Run with --previews to fill listing previews for blobs stored before previews existed
+"""
+
+import argparse
+import time
+from app import app, db, blob_store
+from render_cache import content_hash
+
+def print_report():
+    report = blob_store.report()
+    saved_pct = 100 * report['bytes_saved'] / report['logical_bytes'] if report['logical_bytes'] else 0
+    print(f"Pastes referencing blobs: {report['references']}")
+    print(f"Distinct blobs stored:    {report['blobs']}")
+    print(f"Logical bytes:            {report['logical_bytes']}")
+    print(f"Compressed blobs:         {report['compressed_blobs']}")
+    print(f"Stored bytes:             {report['stored_bytes']}")
+    print(f"Saved by deduplication:   {report['dedup_bytes_saved']}")
+    print(f"Saved by compression:     {report['compression_bytes_saved']}")
+    print(f"Bytes saved:              {report['bytes_saved']} ({saved_pct:.1f}%)")
+
+def migrate(batch_size=500):
+    """Hash every inline body into paste_blob, then drop paste.content"""
+    with app.app_context():
+        db.create_all()
+        columns = [col['name'] for col in db.inspect(db.engine).get_columns('paste')]
+        if 'content' not in columns:
+            print("Paste bodies are already stored as blobs")
+            return True
+
+        if 'blob_hash' not in columns:
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql("ALTER TABLE paste ADD COLUMN blob_hash VARCHAR(64)")
+            print("Added paste.blob_hash column")
+
+        started = time.perf_counter()
+        migrated = 0
+        while True:
+            # Each batch is its own transaction, so the migration can resume
+            with db.engine.begin() as connection:
+                rows = connection.exec_driver_sql(
+                    "SELECT id, content FROM paste WHERE blob_hash IS NULL ORDER BY id LIMIT ?",
+                    (batch_size,)
+                ).all()
+                for paste_id, content in rows:
+                    digest = content_hash(content)
+                    blob_store.acquire(connection, digest, content)
+                    connection.exec_driver_sql(
+                        "UPDATE paste SET blob_hash = ? WHERE id = ?", (digest, paste_id)
+                    )
+            if not rows:
+                break
+            migrated += len(rows)
+            print(f"  migrated {migrated} pastes")
+
+        try:
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql("ALTER TABLE paste DROP COLUMN content")
+        except Exception as e:
+            print(f"❌ Could not drop paste.content (SQLite 3.35+ required): {e}")
+            return False
+
+        for index in db.metadata.tables['paste'].indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ Migrated {migrated} pastes in {elapsed:.1f}s")
+        print_report()
+        return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='pastes per transaction (default: 500)')
+    parser.add_argument('--report', action='store_true',
+                        help='only print the storage report')
+    parser.add_argument('--compress', action='store_true',
+                        help='compress existing blobs above BLOB_COMPRESS_THRESHOLD')
+    parser.add_argument('--previews', action='store_true',
+                        help='store listing previews for blobs that have none')
+    args = parser.parse_args()
+    if args.report:
+        with app.app_context():
+            print_report()
+    elif args.compress:
+        with app.app_context():
+            if blob_store.codec == 'none':
+                print("BLOB_CODEC is 'none', nothing to do")
+            else:
+                started = time.perf_counter()
+                compressed = blob_store.compress_existing(batch_size=args.batch_size)
+                print(f"✅ Compressed {compressed} blobs with {blob_store.codec} "
+                      f"in {time.perf_counter() - started:.1f}s")
+                print_report()
+    elif args.previews:
+        with app.app_context():
+            started = time.perf_counter()
+            filled = blob_store.fill_previews(batch_size=args.batch_size)
+            print(f"✅ Stored previews for {filled} blobs in {time.perf_counter() - started:.1f}s")
+    elif not migrate(batch_size=args.batch_size):
+        exit(1)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Search index rebuild script for Dustbin
+Recreates the FTS5 full-text index from the existing pastes
+"""
+
+import argparse
+import time
+from app import app, search_index
+
+def rebuild(batch_size=1000):
+    """Drop and repopulate the search index"""
+    if not search_index.available:
+        print("❌ SQLite FTS5 is not available for this database")
+        return False
+
+    print(f"Rebuilding search index, batch size {batch_size}")
+    started = time.perf_counter()
+    with app.app_context():
+        indexed = search_index.rebuild(batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Indexed {indexed} pastes in {elapsed:.1f}s")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='pastes per transaction (default: 1000)')
+    args = parser.parse_args()
+    if not rebuild(batch_size=args.batch_size):
+        exit(1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Rendering cache for Dustbin
+Content-addressed LRU of highlighted HTML, bounded by total size in bytes
+"""
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+
+def content_hash(content: str) -> str:
+    """Return the SHA-256 hex digest of a paste body"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Thread-safe LRU cache keyed by (content hash, lexer, style, linenos)"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_hash = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(digest: str, lexer: str, style: str, linenos: bool) -> Tuple:
+        return (digest, lexer, style, bool(linenos))
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, html: str):
+        size = sys.getsizeof(html)
+        if size > self.max_bytes:
+            # Never let one huge render flush the whole cache
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (html, size)
+            self._by_hash.setdefault(key[0], set()).add(key)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        _, size = self._entries.pop(key)
+        self.current_bytes -= size
+        keys = self._by_hash.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_hash[key[0]]
+
+    def invalidate(self, digest: str) -> int:
+        """Drop every rendering of the given content hash"""
+        with self._lock:
+            keys = list(self._by_hash.get(digest, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_hash.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global rendering cache instance
+render_cache = RenderCache()
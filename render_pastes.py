@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Backfill script for Dustbin
+Renders highlighted HTML for existing pastes into the rendered_paste table
+"""
+
+import argparse
+import time
+from app import app, db, Paste, RenderedPaste, RENDER_VERSION, get_pygments_lexer_for_language
+
+def find_stale_ids(after_id, batch_size, force=False):
+    """Return the next batch of paste ids and which of them need rendering"""
+    rows = db.session.query(
+        Paste.id, Paste.language, Paste.blob_hash, RenderedPaste.pygments_lexer,
+        RenderedPaste.render_version, RenderedPaste.blob_hash
+    ).outerjoin(RenderedPaste, RenderedPaste.paste_id == Paste.id).filter(
+        Paste.id > after_id
+    ).order_by(Paste.id).limit(batch_size).all()
+
+    stale = [
+        paste_id for paste_id, language, blob_hash, lexer, version, rendered_hash in rows
+        if force or lexer is None
+        or lexer != get_pygments_lexer_for_language(language)
+        or version != RENDER_VERSION
+        # Content edited while RENDER_ON_WRITE was off, or rendered before hashes were stored
+        or rendered_hash != blob_hash
+    ]
+    last_id = rows[-1][0] if rows else None
+    return last_id, stale
+
+def backfill(batch_size=200, force=False):
+    """Render missing or stale pastes in batches, one transaction per batch"""
+    print(f"Backfilling renders ({RENDER_VERSION}), batch size {batch_size}")
+    started = time.perf_counter()
+    rendered = 0
+    after_id = ''
+
+    with app.app_context():
+        while True:
+            last_id, stale = find_stale_ids(after_id, batch_size, force)
+            if last_id is None:
+                break
+
+            if stale:
+                for paste in Paste.query.options(db.joinedload(Paste.rendered)).filter(
+                        Paste.id.in_(stale)).all():
+                    paste.store_rendered()
+                db.session.commit()
+                # Release rendered HTML held by the identity map
+                db.session.expunge_all()
+
+            rendered += len(stale)
+            after_id = last_id
+            print(f"  up to {last_id}: rendered {len(stale)} in this batch")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Rendered {rendered} pastes in {elapsed:.1f}s")
+    return rendered
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help='pastes per transaction (default: 200)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every paste, even fresh ones')
+    args = parser.parse_args()
+    backfill(batch_size=args.batch_size, force=args.force)
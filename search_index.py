@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Full-text search index for Dustbin
+Keeps an SQLite FTS5 table in sync with pastes and answers ranked searches
+"""
+
+import re
+from typing import List, Tuple, Optional
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect, func, literal_column, or_, select, table, column
+
+FTS_TABLE = 'paste_fts'
+# Integer document ids for paste ids; FTS5 can only look rows up by rowid
+DOCID_TABLE = 'paste_fts_docid'
+
+# Column weights for bm25(): title, content
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+# Control characters used as snippet markers so the text can be escaped safely
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def render_snippet(raw: Optional[str]) -> Markup:
+    """Escape an FTS5 snippet and highlight the matched terms"""
+    if not raw:
+        return Markup('')
+    escaped = str(escape(raw))
+    return Markup(escaped.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+class SearchIndex:
+    """FTS5 index over paste titles and bodies, maintained from mapper events"""
+
+    def __init__(self):
+        self.db = None
+        self.model = None
+        self.available = False
+        self._ready = False
+        self.fts = table(FTS_TABLE, column('rowid'), column('title'), column('content'))
+        self.docids = table(DOCID_TABLE, column('docid'), column('paste_id'))
+
+    def init_app(self, app, db, model):
+        self.db = db
+        self.model = model
+        with app.app_context():
+            self.available = self._supports_fts5(db.engine)
+        if not self.available:
+            print("FTS5 not available, search falls back to LIKE scans")
+            return
+
+        event.listen(db.metadata, 'after_create', self._after_create)
+        event.listen(db.metadata, 'before_drop', self._before_drop)
+        event.listen(model, 'after_insert', self._after_insert)
+        event.listen(model, 'after_update', self._after_update)
+        event.listen(model, 'after_delete', self._after_delete)
+
+    @staticmethod
+    def _supports_fts5(engine) -> bool:
+        if engine.dialect.name != 'sqlite':
+            return False
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+                conn.exec_driver_sql("DROP TABLE temp.fts5_probe")
+            return True
+        except Exception:
+            return False
+
+    def create_table(self, connection):
+        legacy = any(row[1] == 'paste_id' for row in
+                     connection.exec_driver_sql(f"PRAGMA table_info({FTS_TABLE})"))
+        if legacy:
+            connection.exec_driver_sql(f"ALTER TABLE {FTS_TABLE} RENAME TO {FTS_TABLE}_legacy")
+        connection.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {DOCID_TABLE} "
+            f"(docid INTEGER PRIMARY KEY, paste_id VARCHAR(8) NOT NULL UNIQUE)"
+        )
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(title, content, tokenize='unicode61')"
+        )
+        if legacy:
+            self._migrate_legacy(connection)
+        self._ready = True
+
+    def _migrate_legacy(self, connection):
+        """Move an index keyed by an UNINDEXED paste_id column onto integer docids"""
+        print("Migrating the search index to integer document ids")
+        connection.exec_driver_sql(
+            f"INSERT OR IGNORE INTO {DOCID_TABLE} (paste_id) SELECT paste_id FROM {FTS_TABLE}_legacy"
+        )
+        connection.exec_driver_sql(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+            f"SELECT d.docid, l.title, l.content FROM {FTS_TABLE}_legacy l "
+            f"JOIN {DOCID_TABLE} d ON d.paste_id = l.paste_id"
+        )
+        connection.exec_driver_sql(f"DROP TABLE {FTS_TABLE}_legacy")
+
+    def drop_table(self, connection):
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {DOCID_TABLE}")
+        self._ready = False
+
+    def _ensure_table(self, connection):
+        if not self._ready:
+            self.create_table(connection)
+
+    def _after_create(self, target, connection, **kw):
+        self.create_table(connection)
+
+    def _before_drop(self, target, connection, **kw):
+        self.drop_table(connection)
+
+    def _insert(self, connection, pastes):
+        """Assign docids to the pastes and index their text under them"""
+        connection.execute(self.docids.insert(), [{'paste_id': paste.id} for paste in pastes])
+        docids = dict(connection.execute(
+            select(self.docids.c.paste_id, self.docids.c.docid).where(
+                self.docids.c.paste_id.in_([paste.id for paste in pastes]))
+        ).all())
+        connection.execute(self.fts.insert(), [
+            {'rowid': docids[paste.id], 'title': paste.title or '', 'content': paste.content}
+            for paste in pastes
+        ])
+
+    def _delete(self, connection, paste_ids):
+        """Remove index rows by docid, then the docids themselves"""
+        docids = select(self.docids.c.docid).where(self.docids.c.paste_id.in_(paste_ids))
+        connection.execute(self.fts.delete().where(self.fts.c.rowid.in_(docids.scalar_subquery())))
+        connection.execute(self.docids.delete().where(self.docids.c.paste_id.in_(paste_ids)))
+
+    def add(self, connection, pastes):
+        """Index pastes inserted outside the ORM unit of work"""
+        if not self.available or not pastes:
+            return
+        self._ensure_table(connection)
+        self._insert(connection, pastes)
+
+    def remove(self, connection, paste_ids):
+        """Drop index rows for pastes deleted outside the ORM unit of work"""
+        if not self.available:
+            return
+        self._ensure_table(connection)
+        self._delete(connection, paste_ids)
+
+    def _after_insert(self, mapper, connection, target):
+        self._ensure_table(connection)
+        self._insert(connection, [target])
+
+    def _after_update(self, mapper, connection, target):
+        state = inspect(target)
+        if not (state.attrs.title.history.has_changes() or state.attrs.blob_hash.history.has_changes()):
+            return
+        self._ensure_table(connection)
+        self._delete(connection, [target.id])
+        self._insert(connection, [target])
+
+    def _after_delete(self, mapper, connection, target):
+        self._ensure_table(connection)
+        self._delete(connection, [target.id])
+
+    def search(self, query, terms: str, snippet_tokens: int = 16, order_by_rank: bool = True):
+        """Restrict a Paste query to FTS matches, with snippets
+
+        Results are ordered best first unless order_by_rank is False, in
+        which case the query's own ordering is kept. Returns the query
+        yielding (paste, raw snippet) rows, or None if the index is
+        unavailable or the terms contain nothing searchable.
+        """
+        match = build_match_query(terms)
+        if not self.available or match is None:
+            return None
+        fts_name = literal_column(FTS_TABLE)
+        snippet = func.snippet(fts_name, 1, _MARK_START, _MARK_END, '…', snippet_tokens)
+        rank = func.bm25(fts_name, TITLE_WEIGHT, CONTENT_WEIGHT)
+        query = query.join(self.docids, self.docids.c.paste_id == self.model.id).join(
+            self.fts, self.fts.c.rowid == self.docids.c.docid
+        ).filter(
+            fts_name.op('MATCH')(match)
+        ).add_columns(snippet)
+        if order_by_rank:
+            query = query.order_by(None).order_by(rank)
+        return query
+
+    def substring(self, query, text: str):
+        """Restrict a Paste query to titles or bodies containing text
+
+        Reads the index's plain copy, so compressed bodies match too.
+        Returns None if the index is unavailable.
+        """
+        if not self.available:
+            return None
+        return query.join(self.docids, self.docids.c.paste_id == self.model.id).join(
+            self.fts, self.fts.c.rowid == self.docids.c.docid
+        ).filter(or_(self.fts.c.title.contains(text), self.fts.c.content.contains(text)))
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Recreate the index from every paste, one transaction per batch"""
+        connection = self.db.session.connection()
+        self.drop_table(connection)
+        self.create_table(connection)
+        self.db.session.commit()
+
+        Paste = self.model
+        indexed = 0
+        after_id = ''
+        while True:
+            # Load whole pastes so compressed bodies are decompressed by the model
+            pastes = Paste.query.filter(Paste.id > after_id).order_by(Paste.id).limit(batch_size).all()
+            if not pastes:
+                break
+            self._insert(self.db.session.connection(), pastes)
+            indexed += len(pastes)
+            after_id = pastes[-1].id
+            self.db.session.commit()
+        return indexed
+
+
+def split_results(rows) -> Tuple[List, dict]:
+    """Split (paste, raw snippet) rows into pastes and rendered snippets by id"""
+    pastes = []
+    snippets = {}
+    for paste, raw in rows:
+        pastes.append(paste)
+        snippets[paste.id] = render_snippet(raw)
+    return pastes, snippets
+
+
+# Global search index instance
+search_index = SearchIndex()
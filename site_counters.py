@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Site counters for Dustbin
+Maintains global row counts in a small table so pages never run COUNT(*)
+"""
+
+import threading
+import time
+from typing import Dict
+from sqlalchemy import event, update, insert, select, func, literal
+
+
+class SiteCounters:
+    """Row counts kept in step with inserts and deletes, cached briefly in memory"""
+
+    def __init__(self, ttl: float = 10.0):
+        self.ttl = ttl
+        self.db = None
+        self.table = None
+        self.sources = {}
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._expires = 0.0
+
+    def init_app(self, app, db, counter_model, sources):
+        """sources maps counter names to the models whose rows they count"""
+        self.db = db
+        self.table = counter_model.__table__
+        self.ttl = app.config.get('COUNTER_CACHE_TTL', self.ttl)
+        for name, model in sources.items():
+            self.sources[name] = model.__table__
+            event.listen(model, 'after_insert', self._make_listener(name, 1))
+            event.listen(model, 'after_delete', self._make_listener(name, -1))
+
+    def _make_listener(self, name, delta):
+        def listener(mapper, connection, target):
+            self.adjust(connection, name, delta)
+        return listener
+
+    def _seed(self, connection, name):
+        """Create a counter row from an exact count of its source table"""
+        connection.execute(insert(self.table).from_select(
+            ['name', 'value'],
+            select(literal(name), func.count()).select_from(self.sources[name])
+        ))
+
+    def adjust(self, connection, name: str, delta: int):
+        """Apply a change inside the caller's transaction"""
+        result = connection.execute(update(self.table).where(
+            self.table.c.name == name
+        ).values(value=self.table.c.value + delta))
+        # A missing row is left alone; the next read seeds it from an exact count
+        if result.rowcount:
+            self.invalidate()
+
+    def refresh(self):
+        """Recount every source table and store exact values"""
+        # Own transaction, so a caller's pending session work is never committed
+        with self.db.engine.begin() as connection:
+            connection.execute(self.table.delete())
+            for name in self.sources:
+                self._seed(connection, name)
+        self.invalidate()
+
+    def invalidate(self):
+        self._expires = 0.0
+
+    def get_all(self) -> Dict[str, int]:
+        """Return every counter, reading the table at most once per TTL"""
+        if time.monotonic() < self._expires:
+            return self._cache
+        with self._lock:
+            if time.monotonic() < self._expires:
+                return self._cache
+            rows = dict(self.db.session.execute(
+                select(self.table.c.name, self.table.c.value)
+            ).all())
+            missing = [name for name in self.sources if name not in rows]
+            if missing:
+                with self.db.engine.begin() as connection:
+                    for name in missing:
+                        self._seed(connection, name)
+                    rows = dict(connection.execute(
+                        select(self.table.c.name, self.table.c.value)
+                    ).all())
+            self._cache = rows
+            self._expires = time.monotonic() + self.ttl
+            return rows
+
+    def get(self, name: str) -> int:
+        return self.get_all().get(name, 0)
+
+
+# Global counters instance
+site_counters = SiteCounters()
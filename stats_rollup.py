@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Stats rollups for Dustbin
+Per-language and hourly paste counts maintained as pastes come and go
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from sqlalchemy import event, inspect, update, insert, select, delete
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class StatsRollup:
+    """Incrementally maintained rollup tables behind GET /api/v1/stats"""
+
+    def __init__(self, ttl: float = 10.0):
+        self.ttl = ttl
+        self.db = None
+        self.model = None
+        self.languages = None
+        self.hours = None
+        self._lock = threading.Lock()
+        self._cache = None
+        self._expires = 0.0
+
+    def init_app(self, app, db, model, language_model, hourly_model):
+        self.db = db
+        self.model = model
+        self.languages = language_model.__table__
+        self.hours = hourly_model.__table__
+        self.ttl = app.config.get('STATS_CACHE_TTL', self.ttl)
+        event.listen(model, 'after_insert', self._after_insert)
+        event.listen(model, 'after_delete', self._after_delete)
+        event.listen(model, 'after_update', self._after_update)
+
+    def _bump(self, connection, table, key_column, key, total, public):
+        result = connection.execute(update(table).where(key_column == key).values(
+            total=table.c.total + total, public=table.c.public + public
+        ))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(
+                {key_column.name: key, 'total': total, 'public': public}
+            ))
+
+    def apply(self, connection, changes: Counter):
+        """Apply {(language, is_public, hour): delta} inside the caller's transaction"""
+        by_language = Counter()
+        by_hour = Counter()
+        for (language, is_public, hour), delta in changes.items():
+            by_language[language, 'total'] += delta
+            by_hour[hour, 'total'] += delta
+            if is_public:
+                by_language[language, 'public'] += delta
+                by_hour[hour, 'public'] += delta
+
+        for language in {key for key, _ in by_language}:
+            self._bump(connection, self.languages, self.languages.c.language, language,
+                       by_language[language, 'total'], by_language[language, 'public'])
+        for hour in {key for key, _ in by_hour}:
+            self._bump(connection, self.hours, self.hours.c.hour, hour,
+                       by_hour[hour, 'total'], by_hour[hour, 'public'])
+        self._expires = 0.0
+
+    @staticmethod
+    def _key(language, is_public, created_at):
+        return (language or 'text', bool(is_public), hour_bucket(created_at or datetime.utcnow()))
+
+    def _after_insert(self, mapper, connection, target):
+        key = self._key(target.language, target.is_public, target.created_at)
+        self.apply(connection, Counter({key: 1}))
+
+    def _after_delete(self, mapper, connection, target):
+        key = self._key(target.language, target.is_public, target.created_at)
+        self.apply(connection, Counter({key: -1}))
+
+    def _after_update(self, mapper, connection, target):
+        state = inspect(target)
+        language = state.attrs.language.history
+        is_public = state.attrs.is_public.history
+        if not (language.has_changes() or is_public.has_changes()):
+            return
+        old_language = language.deleted[0] if language.deleted else target.language
+        old_public = is_public.deleted[0] if is_public.deleted else target.is_public
+        changes = Counter()
+        changes[self._key(old_language, old_public, target.created_at)] -= 1
+        changes[self._key(target.language, target.is_public, target.created_at)] += 1
+        self.apply(connection, changes)
+
+    def add(self, connection, pastes):
+        """Account for pastes inserted outside the ORM"""
+        changes = Counter(self._key(p.language, p.is_public, p.created_at) for p in pastes)
+        self.apply(connection, changes)
+
+    def remove(self, connection, paste_ids):
+        """Account for pastes about to be bulk-deleted outside the ORM"""
+        Paste = self.model
+        rows = connection.execute(select(
+            Paste.language, Paste.is_public, Paste.created_at
+        ).where(Paste.id.in_(paste_ids))).all()
+        changes = Counter(self._key(*row) for row in rows)
+        self.apply(connection, Counter({key: -count for key, count in changes.items()}))
+
+    def rebuild(self):
+        """Recompute every rollup row from the paste table"""
+        Paste = self.model
+        with self.db.engine.begin() as connection:
+            connection.execute(delete(self.languages))
+            connection.execute(delete(self.hours))
+            changes = Counter()
+            rows = connection.execute(select(
+                Paste.language, Paste.is_public, Paste.created_at
+            )).yield_per(1000)
+            for row in rows:
+                changes[self._key(*row)] += 1
+            self.apply(connection, changes)
+
+    def snapshot(self, now: datetime = None) -> Dict[str, Any]:
+        """Read the rollups, at most once per TTL"""
+        if self._cache is not None and time.monotonic() < self._expires:
+            return self._cache
+        with self._lock:
+            if self._cache is not None and time.monotonic() < self._expires:
+                return self._cache
+
+            now = now or datetime.utcnow()
+            since = hour_bucket(now - timedelta(hours=24))
+            session = self.db.session
+            languages = session.execute(select(
+                self.languages.c.language, self.languages.c.total, self.languages.c.public
+            )).all()
+            hours = session.execute(select(self.hours.c.hour, self.hours.c.public).where(
+                self.hours.c.hour >= since
+            ).order_by(self.hours.c.hour)).all()
+
+            top_languages = sorted(
+                ((language, public) for language, _, public in languages if public > 0),
+                key=lambda item: item[1], reverse=True
+            )[:10]
+            self._cache = {
+                'total_pastes': sum(total for _, total, _ in languages),
+                'public_pastes': sum(public for _, _, public in languages),
+                'recent_pastes_24h': sum(public for _, public in hours),
+                'top_languages': [
+                    {'language': language, 'count': count} for language, count in top_languages
+                ],
+                'hourly_pastes_24h': [
+                    {'hour': hour.isoformat(), 'count': public} for hour, public in hours
+                ],
+                'computed_at': now.isoformat()
+            }
+            self._expires = time.monotonic() + self.ttl
+            return self._cache
+
+    def invalidate(self):
+        self._expires = 0.0
+
+
+# Global rollup instance
+stats_rollup = StatsRollup()
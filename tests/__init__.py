@@ -12,5 +12,18 @@ Run all tests with: python tests/run_tests.py
 Run specific test: python tests/test_all_apis.py
 """
 
+import atexit
+import os
+import shutil
+import tempfile
+
 __version__ = "1.0.0"
 __author__ = "Dustbin Development Team"
+
+# Tests drop and recreate tables, so point the app at a scratch database
+# before anything imports it; the engine is created when app.py is imported
+SCRATCH_DIR = tempfile.mkdtemp(prefix='dustbin-tests-')
+SCRATCH_DATABASE = os.path.join(SCRATCH_DIR, 'dustbin.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + SCRATCH_DATABASE
+os.environ['AI_CACHE_PATH'] = os.path.join(SCRATCH_DIR, 'ai_cache.db')
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
@@ -0,0 +1,20 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import SCRATCH_DATABASE
+from app import app, db
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test against empty tables in the scratch test database"""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+        with app.app_context():
+            if db.engine.url.database != SCRATCH_DATABASE:
+                raise RuntimeError(f"Refusing to reset {db.engine.url}: import tests before app")
+            db.drop_all()
+            db.create_all()
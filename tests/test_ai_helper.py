@@ -0,0 +1,308 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_cache import AICache
+from ai_helper import HuggingFaceAPI, PatternTable, SingleFlight, ai_helper
+from render_cache import content_hash
+
+class FakeInferenceHandler(BaseHTTPRequestHandler):
+    """Answers every model request with a canned completion over keep-alive connections"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def reply(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = json.dumps([{'generated_text': 'print("done")'}]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = reply
+
+    def log_message(self, *args):
+        pass
+
+class HuggingFaceClientTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Point a client with a token at a local stand-in server"""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeInferenceHandler)
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        # Every call here should reach the server
+        self.api = HuggingFaceAPI(cache=AICache(path=None, enabled=False))
+        self.api.api_token = 'test-token'
+        self.api.base_url = f'http://127.0.0.1:{self.server.server_port}/models'
+
+    def tearDown(self):
+        self.api.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_calls_reuse_one_connection(self):
+        """Test sequential calls share a pooled keep-alive connection"""
+        for _ in range(5):
+            self.assertEqual(self.api.generate_code_completion('x = 1'), 'print("done")')
+            self.assertTrue(self.api.test_model_availability('some/model'))
+        self.assertEqual(self.server.connections, 1)
+
+    def run_wave(self, size):
+        threads = [threading.Thread(target=self.api.generate_code_completion, args=('x',))
+                   for _ in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_threads_share_the_pool(self):
+        """Test request threads reuse pooled connections instead of opening new ones"""
+        for _ in range(3):
+            self.run_wave(self.api.pool_size)
+        self.assertLessEqual(self.server.connections, self.api.pool_size)
+
+    def test_connection_errors_are_retried_then_reported(self):
+        """Test an unreachable server fails cleanly after the configured retries"""
+        self.api.max_retries = 2
+        self.api.backoff_factor = 0
+        self.api.session = self.api._build_session()
+        self.server.shutdown()
+        self.server.server_close()
+        self.api.base_url = 'http://127.0.0.1:9/models'
+        self.assertFalse(self.api.test_model_availability('some/model'))
+
+    def run_together(self, func, *args, count=8):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func(*args))) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_calls_share_one_request(self):
+        """Test concurrent identical completions and probes make one upstream call each"""
+        self.server.delay = 0.2
+        self.assertEqual(self.run_together(self.api.generate_code_completion, 'x = 1'),
+                         ['print("done")'] * 8)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.run_together(self.api.test_model_availability, 'some/model'), [True] * 8)
+        self.assertEqual(self.server.requests, 2)
+        stats = self.api.inflight.stats()
+        self.assertEqual((stats['calls'], stats['coalesced'], stats['in_flight']), (2, 14, 0))
+
+        # Different inputs, and calls after the first one finished, go upstream again
+        self.run_together(self.api.generate_code_completion, 'x = 1', 'ruby', count=1)
+        self.run_together(self.api.generate_code_completion, 'x = 1', count=1)
+        self.assertEqual(self.server.requests, 4)
+
+    def wait_for_refresh(self):
+        deadline = time.monotonic() + 5
+        while self.api._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_probes_run_concurrently(self):
+        """Test a refresh costs about one probe, not one per model"""
+        self.server.delay = 0.2
+        started = time.monotonic()
+        available = self.api.refresh_models()
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(available, self.api.models)
+
+    def test_status_answers_from_cache(self):
+        """Test a cold cache answers at once and fills in the background"""
+        self.server.delay = 0.2
+        started = time.monotonic()
+        self.assertEqual(self.api.get_available_models(), {})
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertIsNone(self.api.model_status()['code_completion']['age_seconds'])
+
+        self.wait_for_refresh()
+        self.assertEqual(self.api.get_available_models(), self.api.models)
+        status = self.api.model_status()['code_completion']
+        self.assertTrue(status['available'])
+        self.assertLess(status['age_seconds'], 5)
+
+    def test_stale_results_are_refreshed_once(self):
+        """Test expired results trigger a single background refresh"""
+        self.api.refresh_models()
+        self.api.probe_ttl = 0
+        self.server.delay = 0.2
+        with mock.patch.object(self.api, 'refresh_models', wraps=self.api.refresh_models) as refresh:
+            for _ in range(5):
+                self.assertEqual(self.api.get_available_models(), self.api.models)
+            self.wait_for_refresh()
+        self.assertEqual(refresh.call_count, 1)
+
+class AICacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ai_cache.db')
+        self.cache = AICache(path=self.path, max_entries=2)
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def compute(self, value='result'):
+        def compute():
+            self.calls.append(value)
+            return value
+        return compute
+
+    def test_memory_then_disk_then_compute(self):
+        """Test repeats are answered from memory, evicted entries from disk"""
+        self.assertEqual(self.cache.memoize('explain_code', 'python', 'a', 'm', self.compute('a')), 'a')
+        self.assertEqual(self.cache.memoize('explain_code', 'python', 'a', 'm', self.compute('a')), 'a')
+        self.cache.memoize('explain_code', 'python', 'b', 'm', self.compute('b'))
+        self.cache.memoize('explain_code', 'python', 'c', 'm', self.compute('c'))
+        # 'a' fell out of the two-entry LRU but is still on disk
+        self.assertEqual(self.cache.memoize('explain_code', 'python', 'a', 'm', self.compute('x')), 'a')
+        self.assertEqual(self.calls, ['a', 'b', 'c'])
+        stats = self.cache.stats()['operations']['explain_code']
+        self.assertEqual((stats['memory_hits'], stats['disk_hits'], stats['misses']), (1, 1, 3))
+        self.assertEqual(stats['hit_rate'], 0.4)
+
+        # A new process starts with an empty LRU but the same file
+        restarted = AICache(path=self.path)
+        self.assertEqual(restarted.memoize('explain_code', 'python', 'b', 'm', self.compute('x')), 'b')
+        self.assertEqual(self.calls, ['a', 'b', 'c'])
+
+    def test_bare_file_name(self):
+        """Test a path without a directory part is opened in the working directory"""
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            cache = AICache(path='bare.db')
+            self.assertEqual(cache.memoize('explain_code', 'python', 'a', 'm', self.compute('a')), 'a')
+            cache._connection().close()
+        finally:
+            os.chdir(cwd)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'bare.db')))
+
+    def test_key_includes_language_and_model(self):
+        """Test the same content under another language or model is computed separately"""
+        self.cache.memoize('explain_code', 'python', 'a', 'm', self.compute('python'))
+        self.assertEqual(self.cache.memoize('explain_code', 'ruby', 'a', 'm', self.compute('ruby')), 'ruby')
+        self.assertEqual(self.cache.memoize('explain_code', 'python', 'a', 'n', self.compute('n')), 'n')
+
+    def test_ttl_and_failures(self):
+        """Test expired results and failed calls are computed again"""
+        self.cache.ttls['complete_code'] = 0
+        self.cache.memoize('complete_code', 'python', 'a', 'm', self.compute('a'))
+        self.cache.memoize('complete_code', 'python', 'a', 'm', self.compute('a'))
+        self.cache.memoize('explain_code', 'python', 'b', 'm', self.compute(None))
+        self.cache.memoize('explain_code', 'python', 'b', 'm', self.compute(None))
+        self.assertEqual(self.calls, ['a', 'a', None, None])
+
+    def test_helper_methods_are_memoized(self):
+        """Test completions are requested once per snippet"""
+        api = HuggingFaceAPI(cache=self.cache)
+        api.api_token = 'test-token'
+        with mock.patch.object(api, '_request_completion', return_value='done') as request:
+            for _ in range(3):
+                self.assertEqual(api.generate_code_completion('x = 1'), 'done')
+                self.assertEqual(api.detect_programming_language('def f(): pass'), 'python')
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(self.cache.stats()['operations']['complete_code']['misses'], 1)
+        api.session.close()
+
+    def test_snippet_is_hashed_once(self):
+        """Test a lookup hashes the snippet once for both the cache and in-flight keys"""
+        api = HuggingFaceAPI(cache=self.cache)
+        with mock.patch('ai_helper.content_hash', wraps=content_hash) as helper_hash, \
+                mock.patch('ai_cache.content_hash', wraps=content_hash) as cache_hash:
+            api.detect_programming_language('def f(): pass')
+        self.assertEqual(helper_hash.call_count + cache_hash.call_count, 1)
+        api.session.close()
+
+class SingleFlightTestCase(unittest.TestCase):
+
+    def test_errors_reach_every_waiter(self):
+        """Test a failed call raises in the caller and in everyone who joined it"""
+        flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError('upstream down')
+
+        def join():
+            started.wait()
+            try:
+                flight.do(('op',), lambda: 'not called')
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        waiter = threading.Thread(target=join)
+        waiter.start()
+        with self.assertRaises(RuntimeError):
+            flight.do(('op',), fail)
+        waiter.join()
+        self.assertEqual(errors, ['upstream down'])
+        self.assertEqual(flight.do(('op',), lambda: 'fresh'), 'fresh')
+
+class LanguageDetectionTestCase(unittest.TestCase):
+
+    SAMPLES = {
+        'python': 'def hello():\n    print("hi")\n\nif __name__ == "__main__":\n    hello()\n',
+        'javascript': 'function add(a, b) {\n  const s = a + b;\n  console.log(s);\n}\n',
+        'java': 'public class Main {\n  public static void main(String[] a) { System.out.println(1); }\n}\n',
+        'cpp': '#include <iostream>\nusing namespace std;\nint main() { cout << 1; }\n',
+        'c': '#include <stdio.h>\nint main() { printf("x"); }\n',
+        'html': '<!DOCTYPE html>\n<html><head></head><body></body></html>\n',
+        'sql': 'SELECT id FROM users WHERE id = 1;',
+        'bash': '#!/bin/bash\nfor f in *; do echo $f; done\n',
+        'go': 'package main\nimport "fmt"\nfunc main() { fmt.Println("x") }\n',
+        'php': '<?php\necho $x;\nfunction f() {}\n',
+        'ruby': 'class Foo\n  def bar\n    puts "x"\n  end\nend\n',
+        'kotlin': 'fun main() {\n    val x = 1\n    println(x)\n}\n',
+        'text': 'just some words here',
+    }
+
+    def test_detection_is_unchanged(self):
+        """Test the compiled table gives the same answers as the original heuristic"""
+        for expected, code in self.SAMPLES.items():
+            self.assertEqual(ai_helper.detect_programming_language(code), expected)
+        self.assertEqual(ai_helper.detect_programming_language(''), 'text')
+        # Braces and semicolons outscore Rust's own markers, as they always have
+        rust = 'fn main() {\n    let x = 1;\n    println!("{}", x);\n}\n'
+        self.assertEqual(ai_helper.detect_programming_language(rust), 'css')
+
+    def test_weights_and_case_flags(self):
+        """Test per-pattern weights and case-sensitive patterns"""
+        table = PatternTable({
+            'sql': [('SELECT', 1, True), ('FROM', 1, True)],
+            'prose': ['select', 'from'],
+            'python': [('def ', 5, False)],
+        })
+        self.assertEqual(table.scores('select name from people'), {'prose': 2})
+        self.assertEqual(table.best('SELECT name FROM people'), 'sql')
+        self.assertEqual(table.best('DEF f(): return select from'), 'python')
+        self.assertIsNone(table.best('nothing'))
+
+if __name__ == '__main__':
+    unittest.main()
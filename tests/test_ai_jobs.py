@@ -0,0 +1,110 @@
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from ai_jobs import JobQueue, ai_jobs
+
+class JobQueueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = JobQueue(workers=1, max_queued=1, max_wait=5)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.jobs.shutdown()
+
+    def blocked(self):
+        self.release.wait(5)
+        return 'slow'
+
+    def test_results_and_timings(self):
+        """Test a finished job carries its result, wait and run time"""
+        job = self.jobs.submit(lambda: 42)
+        job = self.jobs.get(job['id'], wait=5)
+        self.assertEqual((job['status'], job['result']), ('done', 42))
+        stats = self.jobs.stats()
+        self.assertEqual((stats['completed'], stats['queue_depth']), (1, 0))
+        self.assertIsNotNone(stats['run_seconds']['mean'])
+
+    def test_full_queue_rejects_at_once(self):
+        """Test submissions beyond the queue size are refused without blocking"""
+        running = self.jobs.submit(self.blocked)
+        deadline = time.monotonic() + 5
+        while running['status'] == 'queued' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        queued = self.jobs.submit(self.blocked)
+        self.assertIsNotNone(queued)
+
+        started = time.monotonic()
+        self.assertIsNone(self.jobs.submit(self.blocked))
+        self.assertLess(time.monotonic() - started, 0.1)
+        stats = self.jobs.stats()
+        self.assertEqual((stats['running'], stats['queue_depth'], stats['rejected']), (1, 1, 1))
+
+        self.release.set()
+        self.assertEqual(self.jobs.get(queued['id'], wait=5)['result'], 'slow')
+
+    def test_failures_are_reported(self):
+        """Test an exception marks the job failed with its message"""
+        def broken():
+            raise RuntimeError('model exploded')
+        with mock.patch('builtins.print'):
+            job = self.jobs.get(self.jobs.submit(broken)['id'], wait=5)
+        self.assertEqual((job['status'], job['error']), ('failed', 'model exploded'))
+        self.assertEqual(self.jobs.stats()['failed'], 1)
+
+    def test_finished_jobs_expire(self):
+        """Test results older than the TTL are forgotten"""
+        self.jobs.result_ttl = 0
+        job = self.jobs.submit(lambda: 1)
+        self.jobs.get(job['id'], wait=5)
+        self.jobs.submit(lambda: 2)
+        self.assertIsNone(self.jobs.get(job['id']))
+
+class AsyncCompletionAPITestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+
+    def test_async_completion_round_trip(self):
+        """Test the POST returns a job at once and long-polling returns the completion"""
+        with mock.patch('app.ai_helper.generate_code_completion', return_value='return n') as complete:
+            response = self.client.post('/api/ai/complete-code',
+                                        json={'code': 'def f(n):', 'async': True})
+            self.assertEqual(response.status_code, 202)
+            job = response.get_json()
+            self.assertEqual(response.headers['Location'], job['status_url'])
+
+            response = self.client.get(f"{job['status_url']}?wait=5")
+        body = response.get_json()
+        self.assertEqual(body['status'], 'done')
+        self.assertEqual(body['result']['completion'], 'return n')
+        complete.assert_called_once_with('def f(n):', 'python')
+
+        self.assertIn('jobs', self.client.get('/api/ai/status').get_json())
+        self.assertEqual(self.client.get('/api/ai/jobs/nope').status_code, 404)
+
+    def test_full_queue_returns_503(self):
+        """Test a full queue is refused with Retry-After"""
+        with mock.patch.object(ai_jobs, 'submit', return_value=None):
+            response = self.client.post('/api/ai/complete-code?async=1', json={'code': 'x'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_sync_mode_is_unchanged(self):
+        """Test requests without async still answer inline"""
+        with mock.patch('app.ai_helper.generate_code_completion', return_value=None):
+            response = self.client.post('/api/ai/complete-code', json={'code': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.get_json()['available'])
+
+if __name__ == '__main__':
+    unittest.main()
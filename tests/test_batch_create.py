@@ -0,0 +1,106 @@
+import unittest
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, Paste, PasteBlob, LanguageStat
+from site_counters import site_counters
+from tests.test_query_counts import count_queries
+
+class BatchCreateTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Start each test from empty tables"""
+        super().setUp()
+        site_counters.invalidate()
+
+    def post_batch(self, pastes):
+        return self.app.post('/api/v1/pastes/batch', json={'pastes': pastes})
+
+    def test_batch_creates_every_paste(self):
+        """Test a batch creates pastes and keeps side tables in step"""
+        rv = self.post_batch([
+            {'content': 'build log line', 'language': 'text', 'title': 'Build'},
+            {'content': 'build log line', 'language': 'text'},
+            {'content': 'print("ok")', 'language': 'python', 'is_public': False},
+        ])
+        self.assertEqual(rv.status_code, 201)
+        body = rv.get_json()
+        self.assertEqual(body['created'], 3)
+        self.assertEqual([r['index'] for r in body['results']], [0, 1, 2])
+        self.assertTrue(body['results'][0]['raw_url'].endswith(f"/paste/{body['results'][0]['id']}/raw"))
+
+        raw = self.app.get(f"/paste/{body['results'][0]['id']}/raw")
+        self.assertEqual(raw.get_data(as_text=True), 'build log line')
+
+        with app.app_context():
+            self.assertEqual(Paste.query.count(), 3)
+            self.assertEqual(PasteBlob.query.filter_by(content='build log line').one().refcount, 2)
+            self.assertEqual(site_counters.get('pastes'), 3)
+            stats = {r.language: (r.total, r.public) for r in LanguageStat.query}
+        self.assertEqual(stats, {'text': (2, 2), 'python': (1, 0)})
+
+        rv = self.app.get('/api/v1/pastes?search=build')
+        self.assertEqual(len(rv.get_json()['pastes']), 2)
+
+    def test_invalid_item_rejects_batch(self):
+        """Test one invalid item reports per-item errors and inserts nothing"""
+        rv = self.post_batch([{'content': 'fine'}, {'title': 'no content'}, 'not an object'])
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual([r['index'] for r in rv.get_json()['results']], [1, 2])
+        with app.app_context():
+            self.assertEqual(Paste.query.count(), 0)
+
+    def test_limits(self):
+        """Test the item count and request size limits"""
+        app.config['BATCH_MAX_ITEMS'] = 2
+        try:
+            rv = self.post_batch([{'content': 'x'}] * 3)
+        finally:
+            app.config['BATCH_MAX_ITEMS'] = 500
+        self.assertEqual(rv.status_code, 413)
+
+        app.config['BATCH_MAX_BYTES'] = 100
+        try:
+            rv = self.post_batch([{'content': 'y' * 200}])
+        finally:
+            app.config['BATCH_MAX_BYTES'] = 32 * 1024 * 1024
+        self.assertEqual(rv.status_code, 413)
+
+    def test_chunked_body_is_limited(self):
+        """Test a body without Content-Length is still held to the size limit"""
+        body = json.dumps([{'content': 'y' * 200}]).encode('utf-8')
+        app.config['BATCH_MAX_BYTES'] = 100
+        try:
+            rv = self.app.post('/api/v1/pastes/batch', input_stream=io.BytesIO(body),
+                               content_type='application/json',
+                               headers={'Transfer-Encoding': 'chunked'},
+                               environ_overrides={'wsgi.input_terminated': True})
+        finally:
+            app.config['BATCH_MAX_BYTES'] = 32 * 1024 * 1024
+        self.assertEqual(rv.status_code, 413)
+        with app.app_context():
+            self.assertEqual(Paste.query.count(), 0)
+
+    def test_malformed_json_is_a_client_error(self):
+        """Test an unparsable body gets a 400, not a 500"""
+        rv = self.app.post('/api/v1/pastes/batch', data='[{"content": ',
+                           content_type='application/json')
+        self.assertEqual(rv.status_code, 400)
+        self.assertIn('error', rv.get_json())
+
+    def test_statements_do_not_grow_with_batch_size(self):
+        """Test the insert is batched rather than one round of statements per paste"""
+        with count_queries() as statements:
+            self.post_batch([{'content': f'log {i}', 'language': 'text'} for i in range(50)])
+        inserts = [s for s in statements if s.startswith('INSERT INTO paste ')]
+        self.assertEqual(len(inserts), 1)
+        with app.app_context():
+            self.assertEqual(Paste.query.count(), 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+import gzip
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, Paste, PasteBlob, purge_pastes
+from blob_store import blob_store
+import migrate_blobs
+import create_db
+
+class BlobStoreTestCase(DatabaseTestCase):
+
+    def add(self, content, count=1):
+        with app.app_context():
+            pastes = [Paste(content=content) for _ in range(count)]
+            db.session.add_all(pastes)
+            db.session.commit()
+            return [p.id for p in pastes]
+
+    def blobs(self):
+        with app.app_context():
+            return {b.content: b.refcount for b in PasteBlob.query}
+
+    def test_duplicate_bodies_share_a_blob(self):
+        """Test identical bodies are stored once with a reference count"""
+        ids = self.add('same body', count=3)
+        self.add('other body')
+        self.assertEqual(self.blobs(), {'same body': 3, 'other body': 1})
+        with app.app_context():
+            self.assertEqual(db.session.get(Paste, ids[0]).content, 'same body')
+
+    def test_delete_collects_garbage(self):
+        """Test deleting the last reference removes the blob"""
+        ids = self.add('short lived', count=2)
+        with app.app_context():
+            db.session.delete(db.session.get(Paste, ids[0]))
+            db.session.commit()
+        self.assertEqual(self.blobs(), {'short lived': 1})
+        with app.app_context():
+            purge_pastes(ids[1:])
+            db.session.commit()
+        self.assertEqual(self.blobs(), {})
+
+    def test_update_moves_reference(self):
+        """Test changing content releases the old blob"""
+        paste_id, = self.add('before')
+        with app.app_context():
+            paste = db.session.get(Paste, paste_id)
+            paste.content = 'after'
+            db.session.commit()
+        self.assertEqual(self.blobs(), {'after': 1})
+
+    def test_content_is_queryable(self):
+        """Test Paste.content still works in SQL filters"""
+        self.add('find the needle here')
+        self.add('nothing to see')
+        with app.app_context():
+            self.assertEqual(Paste.query.filter(Paste.content.contains('needle')).count(), 1)
+
+    def test_report(self):
+        """Test the report counts bytes saved by deduplication"""
+        self.add('x' * 100, count=4)
+        with app.app_context():
+            report = blob_store.report()
+        self.assertEqual(report['logical_bytes'], 400)
+        self.assertEqual(report['stored_bytes'], 100)
+        self.assertEqual(report['bytes_saved'], 300)
+
+    def test_large_bodies_are_compressed(self):
+        """Test bodies above the threshold are stored compressed and read back transparently"""
+        body = 'def handler(request):\n    return respond(request)\n' * 200
+        paste_id, = self.add(body)
+        self.add('tiny')
+        with app.app_context():
+            blob = PasteBlob.query.filter_by(encoding='gzip').one()
+            self.assertEqual(blob.content, '')
+            self.assertLess(len(blob.data), len(body) // 4)
+            self.assertEqual(db.session.get(Paste, paste_id).content, body)
+            self.assertEqual(PasteBlob.query.filter_by(encoding=None).count(), 1)
+            report = blob_store.report()
+        self.assertEqual(report['compressed_blobs'], 1)
+        self.assertGreater(report['compression_bytes_saved'], 0)
+
+    def test_compressed_bodies_match_substring_search(self):
+        """Test searches FTS cannot tokenize still find compressed bodies"""
+        big, = self.add('if a == b:\n    pass\n' * 200)
+        small, = self.add('x == y')
+        rv = self.app.get('/api/v1/pastes?search===')
+        self.assertEqual(sorted(p['id'] for p in rv.get_json()['pastes']), sorted([big, small]))
+        self.assertIn(big.encode(), self.app.get('/search?q===').data)
+
+    def test_listings_do_not_decompress(self):
+        """Test listings use the stored preview and size instead of the body"""
+        body = 'def handler(request):\n    return respond(request)\n' * 200
+        paste_id, = self.add(body)
+        with mock.patch('app.decode_blob') as decode:
+            self.assertIn(body[:100].encode(), self.app.get('/').data.replace(b'&#39;', b"'"))
+            listed = self.app.get('/api/v1/pastes').get_json()['pastes'][0]
+        decode.assert_not_called()
+        self.assertEqual(listed['content_length'], len(body))
+
+    def test_fill_previews(self):
+        """Test blobs stored without a preview get one, compressed or not"""
+        self.add('def handler(request):\n    return respond(request)\n' * 200)
+        self.add('tiny')
+        with app.app_context():
+            db.session.execute(db.update(PasteBlob).values(preview=None))
+            db.session.commit()
+            self.assertEqual(blob_store.fill_previews(batch_size=1), 2)
+            previews = sorted(blob.preview for blob in PasteBlob.query)
+        self.assertEqual(previews[0][:21], 'def handler(request):')
+        self.assertEqual(previews[1], 'tiny')
+
+    def test_raw_serves_stored_gzip(self):
+        """Test raw_paste sends the stored bytes to clients that accept gzip"""
+        body = 'SELECT * FROM paste WHERE id = 1;\n' * 300
+        paste_id, = self.add(body)
+
+        rv = self.app.get(f'/paste/{paste_id}/raw', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(rv.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', rv.headers['Vary'])
+        with app.app_context():
+            self.assertEqual(rv.data, PasteBlob.query.one().data)
+        self.assertEqual(gzip.decompress(rv.data).decode('utf-8'), body)
+
+        rv = self.app.get(f'/paste/{paste_id}/raw')
+        self.assertNotIn('Content-Encoding', rv.headers)
+        self.assertEqual(rv.get_data(as_text=True), body)
+
+    def test_compress_existing(self):
+        """Test blobs stored plain are compressed in place"""
+        body = 'plain text stored before compression\n' * 100
+        with mock.patch.object(blob_store, 'codec', 'none'):
+            paste_id, = self.add(body)
+        with app.app_context():
+            self.assertEqual(blob_store.compress_existing(batch_size=1), 1)
+            self.assertEqual(PasteBlob.query.one().encoding, 'gzip')
+            self.assertEqual(db.session.get(Paste, paste_id).content, body)
+
+    def test_migrate_inline_content(self):
+        """Test migrating a database that still stores bodies inline"""
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql("DROP TABLE paste")
+                connection.exec_driver_sql(
+                    "CREATE TABLE paste (id VARCHAR(8) PRIMARY KEY, title VARCHAR(200), "
+                    "content TEXT NOT NULL, language VARCHAR(50), created_at DATETIME, "
+                    "expires_at DATETIME, is_public BOOLEAN, user_id INTEGER, views INTEGER)"
+                )
+                for i, body in enumerate(['dup', 'dup', 'dup', 'unique']):
+                    connection.exec_driver_sql(
+                        "INSERT INTO paste (id, content, language, is_public, views) "
+                        "VALUES (?, ?, 'text', 1, 0)", (f'legacy{i}', body)
+                    )
+
+        with mock.patch('builtins.print'):
+            self.assertTrue(migrate_blobs.migrate(batch_size=3))
+            # Columns added after the blob migration come from the regular upgrade
+            self.assertTrue(create_db.upgrade_database())
+
+        self.assertEqual(self.blobs(), {'dup': 3, 'unique': 1})
+        with app.app_context():
+            columns = [c['name'] for c in db.inspect(db.engine).get_columns('paste')]
+            self.assertNotIn('content', columns)
+            self.assertEqual(db.session.get(Paste, 'legacy3').content, 'unique')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+from werkzeug.http import http_date
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, User, Paste
+from tests.test_query_counts import count_queries
+
+class ConditionalGetTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Create an owner and one of their pastes"""
+        super().setUp()
+        app.config['WTF_CSRF_ENABLED'] = False
+        with app.app_context():
+            user = User(username='owner', email='owner@example.com',
+                        password_hash=generate_password_hash('password'))
+            db.session.add(user)
+            db.session.flush()
+            paste = Paste(content='0123456789' * 10, language='text', user_id=user.id)
+            db.session.add(paste)
+            db.session.commit()
+            self.paste_id = paste.id
+            self.blob_hash = paste.blob_hash
+
+    def test_raw_etag_is_content_hash(self):
+        """Test the raw body is tagged with its content hash and revalidates with 304"""
+        rv = self.app.get(f'/paste/{self.paste_id}/raw')
+        self.assertEqual(rv.headers['ETag'], f'"{self.blob_hash}"')
+        self.assertIn('Last-Modified', rv.headers)
+
+        with count_queries() as statements:
+            rv = self.app.get(f'/paste/{self.paste_id}/raw',
+                              headers={'If-None-Match': f'"{self.blob_hash}"'})
+        self.assertEqual(rv.status_code, 304)
+        self.assertEqual(rv.data, b'')
+        self.assertFalse([s for s in statements if 'paste_blob' in s])
+
+    def test_if_modified_since(self):
+        """Test Last-Modified revalidation on the JSON endpoints"""
+        later = http_date(datetime.utcnow() + timedelta(minutes=1))
+        earlier = http_date(datetime.utcnow() - timedelta(days=1))
+        for url in (f'/api/paste/{self.paste_id}', f'/api/v1/pastes/{self.paste_id}'):
+            self.assertEqual(self.app.get(url, headers={'If-Modified-Since': later}).status_code, 304)
+            self.assertEqual(self.app.get(url, headers={'If-Modified-Since': earlier}).status_code, 200)
+
+    def test_update_changes_validators(self):
+        """Test api_update_paste bumps updated_at and the ETag"""
+        url = f'/api/v1/pastes/{self.paste_id}'
+        etag = self.app.get(url).headers['ETag']
+        self.assertEqual(self.app.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        self.app.post('/login', data={'username': 'owner', 'password': 'password'})
+        rv = self.app.put(url, json={'title': 'renamed'})
+        self.assertEqual(rv.status_code, 200)
+
+        rv = self.app.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(rv.status_code, 200)
+        self.assertNotEqual(rv.headers['ETag'], etag)
+        self.assertNotEqual(rv.get_json()['updated_at'], rv.get_json()['created_at'])
+        with app.app_context():
+            paste = db.session.get(Paste, self.paste_id)
+            self.assertGreater(paste.updated_at, paste.created_at)
+
+    def test_raw_range(self):
+        """Test byte ranges of the raw body"""
+        rv = self.app.get(f'/paste/{self.paste_id}/raw', headers={'Range': 'bytes=10-19'})
+        self.assertEqual(rv.status_code, 206)
+        self.assertEqual(rv.data, b'0123456789')
+        self.assertEqual(rv.headers['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(rv.headers['Accept-Ranges'], 'bytes')
+
+        rv = self.app.get(f'/paste/{self.paste_id}/raw', headers={'Range': 'bytes=95-'})
+        self.assertEqual(rv.data, b'56789')
+
+        rv = self.app.get(f'/paste/{self.paste_id}/raw', headers={'Range': 'bytes=500-'})
+        self.assertEqual(rv.status_code, 416)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, Paste, RenderedPaste
+from expiry_reaper import ExpiryReaper, expiry_reaper
+from search_index import search_index
+
+class ExpiryReaperTestCase(DatabaseTestCase):
+
+    def tearDown(self):
+        expiry_reaper.batch_size = app.config['EXPIRY_REAPER_BATCH_SIZE']
+
+    def add(self, count, expires_at):
+        with app.app_context():
+            for i in range(count):
+                paste = Paste(content=f'reap me {i}', expires_at=expires_at)
+                paste.store_rendered()
+                db.session.add(paste)
+            db.session.commit()
+
+    def test_reaps_in_bounded_batches(self):
+        """Test expired pastes are removed batch by batch, live ones kept"""
+        self.add(5, datetime.utcnow() - timedelta(minutes=1))
+        self.add(2, datetime.utcnow() + timedelta(days=1))
+        self.add(1, None)
+        expiry_reaper.batch_size = 2
+
+        with mock.patch('builtins.print'):
+            batches = expiry_reaper.run_once()
+
+        self.assertEqual([b['deleted'] for b in batches], [2, 2, 1])
+        self.assertTrue(all('seconds' in b for b in batches))
+        with app.app_context():
+            self.assertEqual(Paste.query.count(), 3)
+            self.assertEqual(RenderedPaste.query.count(), 3)
+
+    @unittest.skipUnless(search_index.available, 'SQLite FTS5 not available')
+    def test_reaped_pastes_leave_search_index(self):
+        """Test reaped pastes no longer appear in search"""
+        self.add(1, datetime.utcnow() - timedelta(minutes=1))
+        with mock.patch('builtins.print'):
+            expiry_reaper.run_once()
+        with app.app_context():
+            count = db.session.execute(search_index.fts.select()).all()
+        self.assertEqual(count, [])
+
+    def test_nothing_to_reap(self):
+        """Test an idle run reports no batches"""
+        self.add(1, None)
+        self.assertEqual(expiry_reaper.run_once(), [])
+
+    def test_concurrent_start_runs_one_thread(self):
+        """Test requests racing to start the reaper start a single thread"""
+        reaper = ExpiryReaper(interval=3600)
+        barrier = threading.Barrier(8)
+
+        def start():
+            barrier.wait()
+            reaper.start()
+
+        callers = [threading.Thread(target=start) for _ in range(8)]
+        try:
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+            running = [t for t in threading.enumerate() if t.name == 'expiry-reaper' and t is not expiry_reaper._thread]
+            self.assertEqual(running, [reaper._thread])
+        finally:
+            reaper.stop()
+        self.assertFalse(reaper.stats()['running'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, Paste
+from tests.test_query_counts import count_queries
+
+class ExportTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Create public pastes an hour apart plus some that must not be exported"""
+        super().setUp()
+        app.config['EXPORT_WINDOW_SIZE'] = 3
+        self.start = datetime(2024, 1, 1)
+        with app.app_context():
+            pastes = [
+                Paste(content=f'paste {i}', language='python' if i % 2 else 'text',
+                      created_at=self.start + timedelta(hours=i))
+                for i in range(7)
+            ]
+            pastes.append(Paste(content='private', is_public=False, created_at=self.start))
+            pastes.append(Paste(content='expired', created_at=self.start,
+                                expires_at=datetime.utcnow() - timedelta(minutes=1)))
+            db.session.add_all(pastes)
+            db.session.commit()
+            self.ids = [p.id for p in pastes[:7]]
+
+    def tearDown(self):
+        app.config['EXPORT_WINDOW_SIZE'] = 500
+
+    def export(self, query=''):
+        rv = self.app.get(f'/api/v1/export.ndjson{query}')
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.mimetype, 'application/x-ndjson')
+        return [json.loads(line) for line in rv.get_data(as_text=True).splitlines()]
+
+    def test_exports_public_pastes_oldest_first(self):
+        """Test every public, unexpired paste is streamed in creation order"""
+        with count_queries() as statements:
+            records = self.export()
+        self.assertEqual([r['id'] for r in records], self.ids)
+        self.assertEqual(records[0]['content'], 'paste 0')
+        # Three windows of three rows, the last one short
+        self.assertEqual(len([s for s in statements if s.startswith('SELECT')]), 3)
+
+    def test_filters(self):
+        """Test language and created_at range filters"""
+        records = self.export('?language=python')
+        self.assertEqual([r['id'] for r in records], self.ids[1::2])
+        since = (self.start + timedelta(hours=2)).isoformat()
+        until = (self.start + timedelta(hours=5)).isoformat()
+        records = self.export(f'?since={since}&until={until}')
+        self.assertEqual([r['id'] for r in records], self.ids[2:5])
+
+    def test_resume_from_cursor(self):
+        """Test a cursor from any line resumes right after it"""
+        records = self.export()
+        resumed = self.export(f"?cursor={records[3]['cursor']}")
+        self.assertEqual([r['id'] for r in resumed], self.ids[4:])
+
+    def test_gzip_variant(self):
+        """Test the .gz variant carries the same records"""
+        rv = self.app.get('/api/v1/export.ndjson.gz')
+        self.assertEqual(rv.mimetype, 'application/gzip')
+        lines = gzip.decompress(rv.data).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], self.ids)
+
+    def test_bad_arguments(self):
+        """Test malformed cursors and dates are rejected up front"""
+        self.assertEqual(self.app.get('/api/v1/export.ndjson?cursor=!!').status_code, 400)
+        self.assertEqual(self.app.get('/api/v1/export.ndjson?since=yesterday').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from ai_cache import AICache
+from ai_helper import HuggingFaceAPI
+from hf_standin import start_stand_in
+
+class StandInTestCase(unittest.TestCase):
+
+    def start(self, **options):
+        server, self.base_url = start_stand_in(**options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def client(self):
+        with mock.patch.dict(os.environ, {'HF_BASE_URL': self.base_url + '/'}):
+            api = HuggingFaceAPI(cache=AICache(path=None, enabled=False))
+        self.addCleanup(api.session.close)
+        api.api_token = 'test-token'
+        return api
+
+    def test_client_follows_hf_base_url(self):
+        """Test HF_BASE_URL points the client at the stand-in"""
+        server = self.start(payload_size=20)
+        api = self.client()
+        self.assertEqual(api.base_url, self.base_url)
+        self.assertTrue(api.test_model_availability('some/model'))
+        self.assertEqual(api.generate_code_completion('x = 1'), 'return result\nreturn')
+        self.assertEqual(server.requests, 2)
+
+    def test_loading_and_error_responses(self):
+        """Test configured 503 loading and 500 error rates"""
+        self.start(loading_rate=1.0)
+        response = requests.post(f'{self.base_url}/some/model', json={'inputs': 'x'})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('currently loading', response.json()['error'])
+        with mock.patch('builtins.print'):
+            self.assertIsNone(self.client().generate_code_completion('x = 1'))
+
+        self.start(error_rate=1.0)
+        self.assertEqual(requests.get(f'{self.base_url}/some/model').status_code, 500)
+
+    def test_latency(self):
+        """Test responses are held for the configured latency"""
+        self.start(latency=0.2)
+        response = requests.get(f'{self.base_url}/some/model')
+        self.assertGreaterEqual(response.elapsed.total_seconds(), 0.15)
+
+if __name__ == '__main__':
+    unittest.main()
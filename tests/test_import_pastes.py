@@ -0,0 +1,152 @@
+import unittest
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+from unittest import mock
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, User, Paste, LanguageStat
+import import_pastes
+
+class ImportPastesTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Start from empty tables and a scratch directory of files"""
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = {
+            'main.py': 'print("hello")',
+            'lib/util.rs': 'fn main() {}',
+            'notes/readme': 'no extension',
+            'image.bin': b'\x89PNG\x00\x01',
+        }
+        for name, body in self.files.items():
+            path = os.path.join(self.tmp.name, 'tree', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(body if isinstance(body, bytes) else body.encode('utf-8'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_import(self, source, **kwargs):
+        with mock.patch('builtins.print'):
+            return import_pastes.import_source(source, **kwargs)
+
+    def add_user(self, username):
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com',
+                        password_hash=generate_password_hash('password'))
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    def imported(self):
+        with app.app_context():
+            return {p.title: (p.language, p.content) for p in Paste.query}
+
+    def test_directory_import_infers_languages(self):
+        """Test files become pastes with languages from their extensions"""
+        self.assertEqual(self.run_import(os.path.join(self.tmp.name, 'tree'), chunk_size=2), 3)
+        self.assertEqual(self.imported(), {
+            'main.py': ('python', 'print("hello")'),
+            'lib/util.rs': ('rust', 'fn main() {}'),
+            'notes/readme': ('text', 'no extension'),
+        })
+        with app.app_context():
+            self.assertEqual(sum(row.total for row in LanguageStat.query), 3)
+
+    def test_tarball_import(self):
+        """Test a gzipped tarball imports like the directory it came from"""
+        archive = os.path.join(self.tmp.name, 'tree.tar.gz')
+        with tarfile.open(archive, 'w:gz') as tar:
+            for name, body in self.files.items():
+                data = body if isinstance(body, bytes) else body.encode('utf-8')
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        self.assertEqual(self.run_import(archive), 3)
+        self.assertEqual(self.imported()['lib/util.rs'], ('rust', 'fn main() {}'))
+
+    def test_ndjson_import(self):
+        """Test NDJSON records keep their fields, inferring missing languages from titles"""
+        owner_id = self.add_user('owner')
+        dump = os.path.join(self.tmp.name, 'dump.ndjson')
+        with open(dump, 'w') as f:
+            f.write(json.dumps({'title': 'query.sql', 'content': 'SELECT 1;',
+                                'created_at': '2023-05-01T10:00:00'}) + '\n')
+            f.write(json.dumps({'title': 'Snippet', 'content': 'x', 'language': 'go',
+                                'is_public': False}) + '\n')
+            f.write('not json\n')
+        self.assertEqual(self.run_import(dump, owner='owner'), 2)
+        with app.app_context():
+            sql = Paste.query.filter_by(title='query.sql').one()
+            self.assertEqual(sql.language, 'sql')
+            self.assertEqual(sql.created_at.year, 2023)
+            self.assertEqual(sql.user_id, owner_id)
+            snippet = Paste.query.filter_by(title='Snippet').one()
+            self.assertFalse(snippet.is_public)
+            self.assertEqual(snippet.user_id, owner_id)
+
+    def test_private_pastes_need_an_owner(self):
+        """Test pastes nobody could open are never created"""
+        dump = os.path.join(self.tmp.name, 'dump.ndjson')
+        with open(dump, 'w') as f:
+            f.write(json.dumps({'title': 'public.py', 'content': 'x = 1'}) + '\n')
+            f.write(json.dumps({'title': 'secret.py', 'content': 'x = 2', 'is_public': False}) + '\n')
+        self.assertEqual(self.run_import(dump), 1)
+        self.assertEqual(set(self.imported()), {'public.py'})
+
+        tree = os.path.join(self.tmp.name, 'tree')
+        with self.assertRaises(ValueError):
+            self.run_import(tree, is_public=False)
+        with self.assertRaises(ValueError):
+            self.run_import(tree, is_public=False, owner='nobody')
+
+        owner_id = self.add_user('owner')
+        self.assertEqual(self.run_import(tree, is_public=False, owner='owner'), 3)
+        with app.app_context():
+            private = Paste.query.filter_by(is_public=False).all()
+            self.assertEqual(len(private), 3)
+            self.assertTrue(all(p.user_id == owner_id for p in private))
+
+    def test_ndjson_records_with_bad_fields_are_skipped(self):
+        """Test a record with mistyped fields is skipped instead of failing its chunk"""
+        dump = os.path.join(self.tmp.name, 'dump.ndjson')
+        with open(dump, 'w') as f:
+            f.write(json.dumps({'title': 'good.py', 'content': 'x = 1'}) + '\n')
+            f.write(json.dumps({'title': 'a', 'content': 'x', 'is_public': 'yes'}) + '\n')
+            f.write(json.dumps({'title': 'b', 'content': 'x', 'language': ['python']}) + '\n')
+            f.write(json.dumps({'title': ['c'], 'content': 'x'}) + '\n')
+            f.write(json.dumps({'title': 'also-good.rs', 'content': 'fn f() {}'}) + '\n')
+        self.assertEqual(self.run_import(dump, chunk_size=10), 2)
+        self.assertEqual(set(self.imported()), {'good.py', 'also-good.rs'})
+
+    def test_resume_after_interruption(self):
+        """Test a rerun continues after the last committed chunk without duplicates"""
+        source = os.path.join(self.tmp.name, 'tree')
+        real_insert = import_pastes.insert_pastes
+        calls = []
+
+        def fail_second_chunk(pastes):
+            calls.append(len(pastes))
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            real_insert(pastes)
+
+        with mock.patch.object(import_pastes, 'insert_pastes', fail_second_chunk):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(source, chunk_size=1)
+        self.assertEqual(len(self.imported()), 1)
+
+        self.assertEqual(self.run_import(source, chunk_size=1), 2)
+        self.assertEqual(len(self.imported()), 3)
+
+if __name__ == '__main__':
+    unittest.main()
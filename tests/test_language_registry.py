@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language_registry import LanguageRegistry, HIGHLIGHT_DIR
+
+class LanguageRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Copy the highlight config into a scratch directory"""
+        self.config_dir = tempfile.mkdtemp()
+        for name in ('languages.json', 'popular.json', 'themes.json'):
+            shutil.copy(os.path.join(HIGHLIGHT_DIR, name), self.config_dir)
+        self.registry = LanguageRegistry(self.config_dir, check_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir)
+
+    def test_lookup_by_id(self):
+        """Test id lookups and lexer fallback"""
+        self.assertEqual(self.registry.get('python')['name'], 'Python')
+        self.assertEqual(self.registry.pygments_lexer('python'), 'python')
+        self.assertEqual(self.registry.pygments_lexer('no-such-language'), 'text')
+
+    def test_lookup_by_extension(self):
+        """Test extension lookups with and without a leading dot"""
+        self.assertEqual(self.registry.for_extension('.py')['id'], 'python')
+        self.assertEqual(self.registry.for_extension('PY')['id'], 'python')
+        self.assertIsNone(self.registry.for_extension('.nope'))
+
+    def test_lookup_by_category(self):
+        """Test category lookups"""
+        web = [lang['id'] for lang in self.registry.in_category('web')]
+        self.assertIn('html', web)
+        self.assertEqual(self.registry.in_category('missing'), [])
+
+    def test_choices_order(self):
+        """Test text comes first and categories are sorted"""
+        choices = self.registry.choices()
+        self.assertEqual(choices[0], ('text', 'Plain Text'))
+        self.assertEqual(len(choices), len(self.registry.config['languages']))
+        self.assertEqual(self.registry.popular_choices()[0][0], 'text')
+
+    def test_reload_on_mtime_change(self):
+        """Test the registry picks up edits to languages.json"""
+        self.assertIsNone(self.registry.get('brainfuck'))
+        path = os.path.join(self.config_dir, 'languages.json')
+        with open(path) as f:
+            config = json.load(f)
+        config['languages'].append({
+            'id': 'brainfuck', 'name': 'Brainfuck', 'pygments_lexer': 'brainfuck',
+            'extensions': ['.bf'], 'category': 'programming'
+        })
+        with open(path, 'w') as f:
+            json.dump(config, f)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(self.registry.for_extension('.bf')['id'], 'brainfuck')
+
+    def test_missing_file_fallback(self):
+        """Test the built-in fallback when languages.json is missing"""
+        registry = LanguageRegistry(os.path.join(self.config_dir, 'missing'))
+        self.assertEqual(registry.pygments_lexer('python'), 'python')
+        self.assertEqual(registry.popular_choices(), [])
+
+if __name__ == '__main__':
+    unittest.main()
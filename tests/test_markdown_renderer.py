@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bleach
+import markdown
+
+from markdown_renderer import (MarkdownRenderer, EXTENSIONS, ALLOWED_TAGS, ALLOWED_ATTRIBUTES,
+                               markdown_renderer)
+from render_cache import RenderCache, render_cache
+from tests.base import DatabaseTestCase
+from app import app, db, Paste
+
+DOCUMENT = '''# Title
+
+Some *text* with a [link](https://example.com "t").
+Second line
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+```python
+print("hi")
+```
+
+<script>alert(1)</script>
+'''
+
+def original_preview(content):
+    """The pipeline as it was: a new converter and allow-lists on every call"""
+    html = markdown.Markdown(extensions=EXTENSIONS).convert(content)
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+
+class MarkdownRendererTestCase(DatabaseTestCase):
+
+    def test_output_is_unchanged_and_sanitized(self):
+        """Test reused converters give the same HTML as a fresh one, scripts escaped"""
+        renderer = MarkdownRenderer()
+        for _ in range(2):
+            html = renderer.convert(DOCUMENT)
+            self.assertEqual(html, original_preview(DOCUMENT))
+        self.assertIn('<table>', html)
+        self.assertNotIn('<script>', html)
+        # State from one document never leaks into the next
+        self.assertEqual(renderer.convert('plain'), original_preview('plain'))
+
+    def test_threads_get_their_own_converter(self):
+        """Test concurrent renders on different threads all come out right"""
+        renderer = MarkdownRenderer()
+        documents = [f'# Heading {i}\n\n' + 'word ' * 200 for i in range(16)]
+        results = {}
+
+        def render(index):
+            for _ in range(5):
+                results[index] = renderer.convert(documents[index])
+
+        threads = [threading.Thread(target=render, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index, document in enumerate(documents):
+            self.assertEqual(results[index], original_preview(document))
+
+    def test_render_caches_by_content_hash(self):
+        """Test the second render of the same content is a cache hit"""
+        cache = RenderCache()
+        renderer = MarkdownRenderer(cache)
+        first = renderer.render(DOCUMENT)
+        self.assertEqual(renderer.render(DOCUMENT), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_preview_route_uses_cache(self):
+        """Test repeated previews of a paste are served from the cache"""
+        with app.app_context():
+            paste = Paste(content=DOCUMENT, language='markdown')
+            db.session.add(paste)
+            db.session.commit()
+            paste_id, digest = paste.id, paste.blob_hash
+        render_cache.clear()
+        client = app.test_client()
+        self.assertIn(b'<table>', client.get(f'/paste/{paste_id}/preview').data)
+        key = MarkdownRenderer.make_key(digest)
+        self.assertEqual(render_cache.get(key), markdown_renderer.render(DOCUMENT))
+        misses = render_cache.misses
+        self.assertEqual(client.get(f'/paste/{paste_id}/preview').status_code, 200)
+        self.assertEqual(render_cache.misses, misses)
+
+if __name__ == '__main__':
+    unittest.main()
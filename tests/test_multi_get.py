@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, User, Paste
+from view_counter import view_counter
+from tests.test_query_counts import count_queries
+
+class MultiGetTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Create visible, private and expired pastes"""
+        super().setUp()
+        with app.app_context():
+            owner = User(username='owner', email='owner@example.com', password_hash='unused')
+            db.session.add(owner)
+            db.session.flush()
+            pastes = {
+                'first': Paste(content='one', user_id=owner.id),
+                'second': Paste(content='two'),
+                'private': Paste(content='secret', is_public=False, user_id=owner.id),
+                'expired': Paste(content='old', expires_at=datetime.utcnow() - timedelta(hours=1)),
+            }
+            db.session.add_all(pastes.values())
+            db.session.commit()
+            self.ids = {name: paste.id for name, paste in pastes.items()}
+        view_counter.flush()
+
+    def test_fetches_visible_pastes_in_order(self):
+        """Test visible pastes come back in request order and the rest are missing"""
+        ids = self.ids
+        requested = [ids['second'], ids['private'], 'nosuchid', ids['first'], ids['expired']]
+        rv = self.app.get('/api/v1/pastes?ids=' + ','.join(requested))
+        self.assertEqual(rv.status_code, 200)
+        body = rv.get_json()
+        self.assertEqual([p['id'] for p in body['pastes']], [ids['second'], ids['first']])
+        self.assertEqual(body['pastes'][1]['content'], 'one')
+        self.assertEqual(body['pastes'][1]['author'], 'owner')
+        self.assertEqual(body['missing'], [ids['private'], 'nosuchid', ids['expired']])
+
+    def test_exclude_content(self):
+        """Test content can be left out, without loading the bodies"""
+        with count_queries() as statements:
+            rv = self.app.get(f"/api/v1/pastes?ids={self.ids['first']}&include_content=0")
+        paste = rv.get_json()['pastes'][0]
+        self.assertNotIn('content', paste)
+        self.assertEqual(paste['urls']['raw'], f"http://localhost/paste/{self.ids['first']}/raw")
+        self.assertFalse([s for s in statements if 'FROM paste_blob' in s or 'JOIN paste_blob' in s])
+        self.assertEqual(view_counter.pending(self.ids['first']), 0)
+
+    def test_post_form_uses_one_query(self):
+        """Test the POST form fetches many pastes with a single SELECT"""
+        ids = list(self.ids.values()) * 10
+        with count_queries() as statements:
+            rv = self.app.post('/api/v1/pastes/lookup', json={'ids': ids})
+        self.assertEqual(len(rv.get_json()['pastes']), 2)
+        self.assertEqual(len([s for s in statements if s.startswith('SELECT')]), 1)
+        self.assertEqual(view_counter.pending(self.ids['first']), 1)
+
+    def test_too_many_ids(self):
+        """Test the id count limit"""
+        rv = self.app.post('/api/v1/pastes/lookup', json={'ids': [str(i) for i in range(101)]})
+        self.assertEqual(rv.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, Paste, decode_cursor, _count_cache
+
+class CursorPaginationTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Create pastes, several sharing a created_at timestamp"""
+        super().setUp()
+        base = datetime(2024, 1, 1)
+        with app.app_context():
+            for i in range(7):
+                # Pairs of pastes share a timestamp to exercise the id tie-break
+                db.session.add(Paste(content=f'paste {i}', language='python' if i % 2 else 'text',
+                                     created_at=base + timedelta(minutes=i // 2)))
+            db.session.commit()
+            self.expected = [p.id for p in Paste.query.order_by(
+                Paste.created_at.desc(), Paste.id.desc()).all()]
+
+    def walk(self, url):
+        ids, cursor = [], ''
+        while cursor is not None:
+            data = self.app.get(f'{url}&cursor={cursor}').get_json()
+            ids.extend(p['id'] for p in data['pastes'])
+            cursor = data['pagination']['next_cursor']
+        return ids
+
+    def test_cursor_walk_visits_every_paste_once(self):
+        """Test following next_cursor returns each paste exactly once, in order"""
+        self.assertEqual(self.walk('/api/v1/pastes?per_page=2'), self.expected)
+
+    def test_cursor_walk_with_filter(self):
+        """Test cursors respect the language filter"""
+        ids = self.walk('/api/v1/pastes?per_page=2&language=python')
+        with app.app_context():
+            python_ids = {p.id for p in Paste.query.filter_by(language='python')}
+        self.assertEqual(ids, [i for i in self.expected if i in python_ids])
+
+    def test_total_is_optional(self):
+        """Test totals are only counted when asked for"""
+        data = self.app.get('/api/v1/pastes?cursor=&per_page=3').get_json()
+        self.assertNotIn('total', data['pagination'])
+        data = self.app.get('/api/v1/pastes?cursor=&per_page=3&include_total=1').get_json()
+        self.assertEqual(data['pagination']['total'], 7)
+
+    def test_count_cache_is_bounded(self):
+        """Test totals for many distinct searches do not pile up in memory"""
+        app.config['COUNT_CACHE_MAX_ENTRIES'] = 3
+        try:
+            for i in range(10):
+                self.app.get(f'/api/v1/pastes?cursor=&include_total=1&search=term{i}')
+        finally:
+            app.config['COUNT_CACHE_MAX_ENTRIES'] = 256
+        self.assertLessEqual(len(_count_cache), 3)
+        self.assertIn(('pastes', None, 'term9'), _count_cache)
+
+    def test_non_positive_per_page(self):
+        """Test per_page of zero or less falls back to the default in both modes"""
+        for per_page in (0, -5):
+            rv = self.app.get(f'/api/v1/pastes?cursor=&per_page={per_page}')
+            self.assertEqual(rv.status_code, 200)
+            self.assertEqual([p['id'] for p in rv.get_json()['pastes']], self.expected)
+            rv = self.app.get(f'/api/v1/pastes?page=1&per_page={per_page}')
+            self.assertEqual(rv.status_code, 200)
+            self.assertEqual(len(rv.get_json()['pastes']), 7)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        rv = self.app.get('/api/v1/pastes?cursor=not-a-cursor')
+        self.assertEqual(rv.status_code, 400)
+        with self.assertRaises(ValueError):
+            decode_cursor('!!!')
+
+    def test_page_mode_unchanged(self):
+        """Test page/per_page pagination still works"""
+        data = self.app.get('/api/v1/pastes?page=2&per_page=3').get_json()
+        self.assertEqual([p['id'] for p in data['pastes']], self.expected[3:6])
+        self.assertEqual(data['pagination']['total'], 7)
+        self.assertEqual(data['pagination']['pages'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
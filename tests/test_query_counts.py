@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from tests.base import DatabaseTestCase
+from app import app, db, User, Paste
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+class ListingQueryCountTestCase(DatabaseTestCase):
+    """Guard against listing endpoints issuing one query per row"""
+
+    def setUp(self):
+        """Create pastes spread over many distinct authors"""
+        super().setUp()
+        app.config['WTF_CSRF_ENABLED'] = False
+        with app.app_context():
+            for i in range(25):
+                user = User(username=f'author{i}', email=f'author{i}@example.com',
+                            password_hash='unused')
+                db.session.add(user)
+                db.session.flush()
+                db.session.add(Paste(title=f'Listing {i}', content=f'listing body {i}', user_id=user.id))
+            db.session.commit()
+
+    def assertConstantQueries(self, url_for_size):
+        counts = []
+        for size in (5, 20):
+            with count_queries() as statements:
+                rv = self.app.get(url_for_size(size))
+            self.assertEqual(rv.status_code, 200)
+            counts.append(len(statements))
+        self.assertEqual(counts[0], counts[1], f'query count grows with page size: {counts}')
+
+    def test_api_list_pastes(self):
+        """Test page mode issues the same number of queries at any page size"""
+        self.assertConstantQueries(lambda n: f'/api/v1/pastes?per_page={n}')
+
+    def test_api_list_pastes_cursor(self):
+        """Test cursor mode issues the same number of queries at any page size"""
+        self.assertConstantQueries(lambda n: f'/api/v1/pastes?cursor=&per_page={n}')
+
+    def test_api_list_pastes_author(self):
+        """Test author names are still reported"""
+        data = self.app.get('/api/v1/pastes?per_page=25').get_json()
+        self.assertEqual({p['author'] for p in data['pastes']}, {f'author{i}' for i in range(25)})
+
+    def test_search_page(self):
+        """Test the search page loads authors with the results"""
+        with count_queries() as statements:
+            rv = self.app.get('/search?q=listing')
+        self.assertIn(b'author24', rv.data)
+        self.assertLessEqual(len(statements), 5)
+
+    def test_index(self):
+        """Test the homepage listing is a fixed number of queries"""
+        with count_queries() as statements:
+            self.app.get('/')
+        self.assertLessEqual(len(statements), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render_cache import RenderCache, render_cache, content_hash
+from app import app, Paste
+
+class RenderCacheTestCase(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups update the hit/miss counters"""
+        cache = RenderCache(max_bytes=1024 * 1024)
+        key = RenderCache.make_key(content_hash('x = 1'), 'python', 'default', True)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, '<div>x = 1</div>')
+        self.assertEqual(cache.get(key), '<div>x = 1</div>')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        """Test eviction is driven by total bytes, oldest first"""
+        html = 'a' * 1000
+        cache = RenderCache(max_bytes=3 * sys.getsizeof(html))
+        keys = [RenderCache.make_key(str(i), 'text', 'default', True) for i in range(4)]
+        for key in keys[:3]:
+            cache.put(key, html)
+        cache.get(keys[0])
+        cache.put(keys[3], html)
+
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+
+    def test_oversized_entry_not_cached(self):
+        """Test a single render larger than the budget is skipped"""
+        cache = RenderCache(max_bytes=100)
+        key = RenderCache.make_key('big', 'text', 'default', True)
+        cache.put(key, 'x' * 1000)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_invalidate_by_content_hash(self):
+        """Test invalidation drops every rendering of a body"""
+        cache = RenderCache()
+        digest = content_hash('print(1)')
+        cache.put(RenderCache.make_key(digest, 'python', 'default', True), 'a')
+        cache.put(RenderCache.make_key(digest, 'text', 'default', True), 'b')
+        self.assertEqual(cache.invalidate(digest), 2)
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+    def test_paste_uses_cache(self):
+        """Test repeated highlighting of a paste is served from the cache"""
+        render_cache.clear()
+        with app.app_context():
+            paste = Paste(content='def cached(): pass', language='python')
+            first = paste.get_highlighted_content()
+            hits = render_cache.hits
+            self.assertEqual(paste.get_highlighted_content(), first)
+            self.assertEqual(render_cache.hits, hits + 1)
+
+            paste.invalidate_rendered()
+            self.assertEqual(render_cache.stats()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+from unittest import mock
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, User, Paste, RenderedPaste
+from render_cache import render_cache
+import render_pastes
+
+class RenderOnWriteTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Start each test from empty tables with render-on-write enabled"""
+        super().setUp()
+        app.config['WTF_CSRF_ENABLED'] = False
+        app.config['RENDER_ON_WRITE'] = True
+        render_cache.clear()
+
+    def tearDown(self):
+        app.config['RENDER_ON_WRITE'] = False
+
+    def test_create_stores_render(self):
+        """Test API creation persists the highlighted HTML"""
+        rv = self.app.post('/api/v1/pastes', json={'content': 'x = 1', 'language': 'python'})
+        self.assertEqual(rv.status_code, 201)
+        paste_id = rv.get_json()['id']
+        with app.app_context():
+            rendered = db.session.get(RenderedPaste, paste_id)
+            self.assertIsNotNone(rendered)
+            self.assertEqual(rendered.pygments_lexer, 'python')
+            self.assertIn('highlight', rendered.html)
+
+    def test_view_serves_stored_render(self):
+        """Test viewing a paste does no Pygments work"""
+        rv = self.app.post('/api/v1/pastes', json={'content': 'x = 1', 'language': 'python'})
+        paste_id = rv.get_json()['id']
+        with mock.patch.object(Paste, 'render_highlighted', side_effect=AssertionError):
+            rv = self.app.get(f'/paste/{paste_id}')
+        self.assertEqual(rv.status_code, 200)
+
+    def test_stale_render_falls_back(self):
+        """Test a render made for another lexer is ignored"""
+        with app.app_context():
+            paste = Paste(content='x = 1', language='python')
+            paste.store_rendered()
+            paste.rendered.pygments_lexer = 'text'
+            paste.rendered.html = 'STALE'
+            db.session.add(paste)
+            db.session.commit()
+            self.assertNotEqual(paste.get_highlighted_content(), 'STALE')
+
+    def test_edit_with_flag_off_is_not_served(self):
+        """Test an edit made while RENDER_ON_WRITE is off does not leave the old render in use"""
+        with app.app_context():
+            user = User(username='owner', email='owner@example.com',
+                        password_hash=generate_password_hash('password'))
+            db.session.add(user)
+            db.session.flush()
+            paste = Paste(content='OLD_BODY = 1', language='python', user_id=user.id)
+            paste.store_rendered()
+            db.session.add(paste)
+            db.session.commit()
+            paste_id = paste.id
+        self.app.post('/login', data={'username': 'owner', 'password': 'password'})
+
+        app.config['RENDER_ON_WRITE'] = False
+        rv = self.app.put(f'/api/v1/pastes/{paste_id}', json={'content': 'NEW_BODY = 2'})
+        self.assertEqual(rv.status_code, 200)
+        app.config['RENDER_ON_WRITE'] = True
+
+        html = self.app.get(f'/paste/{paste_id}').get_data(as_text=True)
+        self.assertIn('NEW_BODY', html)
+        self.assertNotIn('OLD_BODY', html)
+
+        # The backfill spots the outdated row and replaces it
+        with mock.patch('builtins.print'):
+            self.assertEqual(render_pastes.backfill(), 1)
+        with app.app_context():
+            self.assertIn('NEW_BODY', db.session.get(RenderedPaste, paste_id).html)
+
+    def test_backfill_renders_missing_rows(self):
+        """Test the backfill command renders pastes created without a render"""
+        app.config['RENDER_ON_WRITE'] = False
+        with app.app_context():
+            for i in range(5):
+                db.session.add(Paste(content=f'print({i})', language='python'))
+            db.session.commit()
+
+        with mock.patch('builtins.print'):
+            self.assertEqual(render_pastes.backfill(batch_size=2), 5)
+            self.assertEqual(render_pastes.backfill(batch_size=2), 0)
+        with app.app_context():
+            self.assertEqual(RenderedPaste.query.count(), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from tests.base import DatabaseTestCase
+from app import app, db, Paste
+from search_index import search_index, build_match_query, render_snippet
+
+@unittest.skipUnless(search_index.available, 'SQLite FTS5 not available')
+class SearchIndexTestCase(DatabaseTestCase):
+
+    def add(self, **kwargs):
+        with app.app_context():
+            paste = Paste(**kwargs)
+            db.session.add(paste)
+            db.session.commit()
+            return paste.id
+
+    def search_ids(self, q):
+        rv = self.app.get(f'/api/v1/pastes?search={q}')
+        return [p['id'] for p in rv.get_json()['pastes']]
+
+    def test_match_query_quotes_tokens(self):
+        """Test user input is reduced to quoted prefix terms"""
+        self.assertEqual(build_match_query('foo "bar'), '"foo"* "bar"*')
+        self.assertIsNone(build_match_query('  ()  '))
+
+    def test_snippet_is_escaped(self):
+        """Test snippets escape paste HTML but keep match markers"""
+        html = str(render_snippet('<b>\x02hit\x03</b>'))
+        self.assertEqual(html, '&lt;b&gt;<mark>hit</mark>&lt;/b&gt;')
+
+    def test_title_ranks_above_content(self):
+        """Test title matches outrank body matches"""
+        body = self.add(title='Other', content='mentions quicksort once')
+        title = self.add(title='Quicksort', content='def sort(xs): pass')
+        self.assertEqual(self.search_ids('quicksort'), [title, body])
+
+    def test_filters_private_and_expired(self):
+        """Test only public, unexpired pastes are returned"""
+        visible = self.add(content='needle visible')
+        self.add(content='needle private', is_public=False)
+        self.add(content='needle expired', expires_at=datetime.utcnow() - timedelta(hours=1))
+        self.assertEqual(self.search_ids('needle'), [visible])
+
+    def test_index_follows_update_and_delete(self):
+        """Test the index tracks content changes and deletions"""
+        paste_id = self.add(content='alpha')
+        with app.app_context():
+            paste = db.session.get(Paste, paste_id)
+            paste.content = 'beta'
+            db.session.commit()
+        self.assertEqual(self.search_ids('alpha'), [])
+        self.assertEqual(self.search_ids('beta'), [paste_id])
+
+        with app.app_context():
+            db.session.delete(db.session.get(Paste, paste_id))
+            db.session.commit()
+        self.assertEqual(self.search_ids('beta'), [])
+
+    def test_search_page_shows_snippet(self):
+        """Test the search page highlights matched terms"""
+        self.add(title='Snippets', content='some text around a <token> match')
+        rv = self.app.get('/search?q=token')
+        self.assertIn(b'&lt;<mark>token</mark>&gt;', rv.data)
+
+    def test_rebuild(self):
+        """Test rebuilding indexes rows written before the index existed"""
+        paste_id = self.add(content='rebuilt content')
+        with app.app_context():
+            search_index.drop_table(db.session.connection())
+            search_index.create_table(db.session.connection())
+            db.session.commit()
+        self.assertEqual(self.search_ids('rebuilt'), [])
+
+        with app.app_context():
+            self.assertEqual(search_index.rebuild(batch_size=1), 1)
+        self.assertEqual(self.search_ids('rebuilt'), [paste_id])
+
+    def test_deletes_look_up_rows_by_docid(self):
+        """Test removing a paste from the index searches by rowid instead of scanning"""
+        paste_id = self.add(content='indexed body')
+        with app.app_context():
+            connection = db.session.connection()
+            compiled = connection.execute(text(
+                "EXPLAIN QUERY PLAN DELETE FROM paste_fts WHERE rowid IN "
+                "(SELECT docid FROM paste_fts_docid WHERE paste_id IN (:paste_id))"
+            ), {'paste_id': paste_id}).all()
+            self.assertIn('INDEX 0:=', ' '.join(row[-1] for row in compiled))
+            search_index.remove(connection, [paste_id])
+            db.session.commit()
+            self.assertEqual(db.session.execute(search_index.docids.select()).all(), [])
+        self.assertEqual(self.search_ids('indexed'), [])
+
+    def test_legacy_index_is_migrated(self):
+        """Test an index keyed by an UNINDEXED paste_id column moves onto docids"""
+        paste_id = self.add(title='Legacy', content='carried over')
+        with app.app_context():
+            connection = db.session.connection()
+            search_index.drop_table(connection)
+            connection.exec_driver_sql(
+                "CREATE VIRTUAL TABLE paste_fts USING fts5(paste_id UNINDEXED, title, content)"
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO paste_fts VALUES (?, 'Legacy', 'carried over')", (paste_id,)
+            )
+            with mock.patch('builtins.print'):
+                search_index.create_table(connection)
+            db.session.commit()
+        self.assertEqual(self.search_ids('carried'), [paste_id])
+
+if __name__ == '__main__':
+    unittest.main()
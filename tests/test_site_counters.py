@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, User, Paste, SiteCounter, purge_pastes
+from site_counters import site_counters
+from tests.test_query_counts import count_queries
+
+class SiteCountersTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Start each test from empty tables and a cold cache"""
+        super().setUp()
+        site_counters.invalidate()
+
+    def add_pastes(self, count, **kwargs):
+        with app.app_context():
+            pastes = [Paste(content=f'counted {i}', **kwargs) for i in range(count)]
+            db.session.add_all(pastes)
+            db.session.commit()
+            return [p.id for p in pastes]
+
+    def test_counters_follow_inserts_and_deletes(self):
+        """Test counters track ORM inserts and deletes"""
+        ids = self.add_pastes(3)
+        with app.app_context():
+            db.session.add(User(username='counted', email='c@example.com', password_hash='x'))
+            db.session.delete(db.session.get(Paste, ids[0]))
+            db.session.commit()
+            self.assertEqual(site_counters.get('pastes'), 2)
+            self.assertEqual(site_counters.get('users'), 1)
+
+    def test_counters_follow_bulk_purge(self):
+        """Test bulk deletes by the expiry reaper adjust the counter"""
+        ids = self.add_pastes(4, expires_at=datetime.utcnow() - timedelta(minutes=1))
+        with app.app_context():
+            purge_pastes(ids[:3])
+            db.session.commit()
+            self.assertEqual(site_counters.get('pastes'), 1)
+
+    def test_seeds_missing_rows(self):
+        """Test counters are seeded from an exact count when absent"""
+        self.add_pastes(2)
+        with app.app_context():
+            SiteCounter.query.delete()
+            db.session.commit()
+            site_counters.invalidate()
+            self.assertEqual(site_counters.get('pastes'), 2)
+            self.assertEqual(SiteCounter.query.count(), 2)
+
+    def test_page_render_does_not_count(self):
+        """Test rendering pages never runs COUNT over the tables"""
+        self.add_pastes(2)
+        self.app.get('/login')
+        with count_queries() as statements:
+            rv = self.app.get('/login')
+            self.app.get('/register')
+        self.assertEqual(rv.status_code, 200)
+        self.assertFalse([s for s in statements if 'count(' in s.lower()])
+
+    def test_homepage_shows_counts(self):
+        """Test the homepage reports the maintained totals"""
+        self.add_pastes(3)
+        site_counters.invalidate()
+        rv = self.app.get('/')
+        self.assertIn(b'<strong>Total Pastes:</strong> 3', rv.data)
+
+if __name__ == '__main__':
+    unittest.main()
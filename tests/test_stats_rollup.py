@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import DatabaseTestCase
+from app import app, db, Paste, LanguageStat, purge_pastes
+from stats_rollup import stats_rollup
+from site_counters import site_counters
+from tests.test_query_counts import count_queries
+
+class StatsRollupTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Create a mix of public and private pastes"""
+        super().setUp()
+        with app.app_context():
+            old = datetime.utcnow() - timedelta(days=3)
+            pastes = [
+                Paste(content='a', language='python'),
+                Paste(content='b', language='python'),
+                Paste(content='c', language='python', created_at=old),
+                Paste(content='d', language='rust'),
+                Paste(content='e', language='rust', is_public=False),
+            ]
+            db.session.add_all(pastes)
+            db.session.commit()
+            self.ids = [p.id for p in pastes]
+        stats_rollup.invalidate()
+        site_counters.invalidate()
+
+    def get_stats(self):
+        stats_rollup.invalidate()
+        return self.app.get('/api/v1/stats').get_json()
+
+    def test_stats_from_rollups(self):
+        """Test totals, top languages and the 24h window"""
+        stats = self.get_stats()
+        self.assertEqual(stats['total_pastes'], 5)
+        self.assertEqual(stats['public_pastes'], 4)
+        self.assertEqual(stats['recent_pastes_24h'], 3)
+        self.assertEqual(stats['top_languages'], [
+            {'language': 'python', 'count': 3}, {'language': 'rust', 'count': 1}
+        ])
+        self.assertIn('computed_at', stats)
+
+    def test_endpoint_does_not_scan_pastes(self):
+        """Test the endpoint never queries the paste table"""
+        self.get_stats()
+        stats_rollup.invalidate()
+        with count_queries() as statements:
+            self.app.get('/api/v1/stats')
+        self.assertFalse([s for s in statements if 'FROM paste' in s])
+
+    def test_update_moves_counts(self):
+        """Test changing language or visibility moves a paste between rows"""
+        with app.app_context():
+            paste = db.session.get(Paste, self.ids[4])
+            paste.is_public = True
+            paste.language = 'go'
+            db.session.commit()
+        stats = self.get_stats()
+        self.assertEqual(stats['public_pastes'], 5)
+        self.assertIn({'language': 'go', 'count': 1}, stats['top_languages'])
+
+    def test_deletes_and_purges(self):
+        """Test ORM deletes and bulk purges decrement the rollups"""
+        with app.app_context():
+            db.session.delete(db.session.get(Paste, self.ids[0]))
+            purge_pastes(self.ids[2:4])
+            db.session.commit()
+        stats = self.get_stats()
+        self.assertEqual(stats['total_pastes'], 2)
+        self.assertEqual(stats['recent_pastes_24h'], 1)
+
+    def test_rebuild_matches_incremental(self):
+        """Test a full rebuild agrees with the incremental rows"""
+        with app.app_context():
+            before = sorted((r.language, r.total, r.public) for r in LanguageStat.query)
+            stats_rollup.rebuild()
+            after = sorted((r.language, r.total, r.public) for r in LanguageStat.query)
+        self.assertEqual(before, after)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from tests.base import DatabaseTestCase
+from app import app, db, Paste
+from view_counter import view_counter
+
+class ViewCounterTestCase(DatabaseTestCase):
+
+    def setUp(self):
+        """Start each test from empty tables and an empty buffer"""
+        super().setUp()
+        with app.app_context():
+            paste = Paste(content='print("views")', language='python')
+            db.session.add(paste)
+            db.session.commit()
+            self.paste_id = paste.id
+        view_counter.flush()
+
+    def get_views(self):
+        with app.app_context():
+            return db.session.get(Paste, self.paste_id).views
+
+    def test_view_does_not_write(self):
+        """Test viewing a paste issues no UPDATE"""
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            rv = self.app.get(f'/paste/{self.paste_id}')
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        self.assertEqual(rv.status_code, 200)
+        self.assertFalse([s for s in statements if s.lstrip().upper().startswith('UPDATE')])
+        self.assertEqual(view_counter.pending(self.paste_id), 1)
+
+    def test_flush_aggregates_views(self):
+        """Test buffered views from many threads land in one flush"""
+        threads = [
+            threading.Thread(target=lambda: [view_counter.record(self.paste_id) for _ in range(50)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        flushed = view_counter.flush()
+        self.assertEqual(flushed, 200)
+        self.assertEqual(self.get_views(), 200)
+        self.assertEqual(view_counter.pending(self.paste_id), 0)
+
+    def test_api_reports_pending_views(self):
+        """Test the API view count includes buffered views"""
+        self.app.get(f'/api/v1/pastes/{self.paste_id}')
+        rv = self.app.get(f'/api/v1/pastes/{self.paste_id}')
+        self.assertEqual(rv.get_json()['views'], 2)
+        view_counter.flush()
+        self.assertEqual(self.get_views(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+View counter for Dustbin
+Buffers paste view increments in memory and writes them back in batches
+"""
+
+import atexit
+import threading
+import time
+from typing import Dict, Any
+from sqlalchemy import update, bindparam
+
+
+class ViewCounter:
+    """Thread-safe write-behind buffer of per-paste view increments"""
+
+    def __init__(self, interval: float = 5.0, threshold: int = 1000):
+        self.interval = interval
+        self.threshold = threshold
+        self.app = None
+        self.db = None
+        self._statement = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._pending_total = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self.flushes = 0
+        self.flushed_views = 0
+        self.last_flush_seconds = 0.0
+
+    def init_app(self, app, db, model):
+        """Bind the counter to the app's database and the model holding views"""
+        self.app = app
+        self.db = db
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', self.interval)
+        self.threshold = app.config.get('VIEW_FLUSH_THRESHOLD', self.threshold)
+        table = model.__table__
+        self._statement = update(table).where(
+            table.c.id == bindparam('paste_id')
+        ).values(views=table.c.views + bindparam('increment'))
+        atexit.register(self.shutdown)
+
+    def record(self, paste_id: str):
+        """Count one view; never touches the database"""
+        with self._lock:
+            self._pending[paste_id] = self._pending.get(paste_id, 0) + 1
+            self._pending_total += 1
+            over_threshold = self._pending_total >= self.threshold
+        if self._thread is None:
+            self._start()
+        if over_threshold:
+            self._wake.set()
+
+    def pending(self, paste_id: str) -> int:
+        """Views recorded for a paste but not yet written back"""
+        with self._lock:
+            return self._pending.get(paste_id, 0)
+
+    def flush(self) -> int:
+        """Write every buffered increment in one batched UPDATE"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_total = 0
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                # A fresh app context gets its own session, separate from any request
+                with self.app.app_context():
+                    self.db.session.execute(self._statement, [
+                        {'paste_id': paste_id, 'increment': count}
+                        for paste_id, count in pending.items()
+                    ])
+                    self.db.session.commit()
+            except Exception as e:
+                print(f"Error flushing view counts: {e}")
+                self._restore(pending)
+                return 0
+
+            views = sum(pending.values())
+            self.flushes += 1
+            self.flushed_views += views
+            self.last_flush_seconds = time.perf_counter() - started
+            return views
+
+    def _restore(self, pending: Dict[str, int]):
+        """Put increments back after a failed flush so they are retried"""
+        with self._lock:
+            for paste_id, count in pending.items():
+                self._pending[paste_id] = self._pending.get(paste_id, 0) + count
+                self._pending_total += count
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None or self._stopped:
+                return
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def shutdown(self):
+        """Stop the background flusher and write out anything still buffered"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        if self.app is not None:
+            self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending_views = self._pending_total
+        return {
+            'pending_views': pending_views,
+            'flushes': self.flushes,
+            'flushed_views': self.flushed_views,
+            'last_flush_seconds': round(self.last_flush_seconds, 4)
+        }
+
+
+# Global view counter instance
+view_counter = ViewCounter()